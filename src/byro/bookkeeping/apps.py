@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BookkeepingConfig(AppConfig):
     name = 'byro.bookkeeping'
+
+    def ready(self):
+        from . import signals  # noqa
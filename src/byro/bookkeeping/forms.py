@@ -1,10 +1,74 @@
+from decimal import Decimal
+
 from django import forms
+from django.utils.translation import ugettext_lazy as _
+
+from byro.common.models.choices import Choices
 
 from .models import VirtualTransaction
 
 
+class SplitType(Choices):
+    FIXED = 'fixed'
+    PERCENTAGE = 'percentage'
+
+    valid_choices = [FIXED, PERCENTAGE]
+
+
+def split_transactions(real_transactions, lines) -> list:
+    """
+    Applies a split template to each of the given RealTransactions and
+    returns the resulting unsaved VirtualTransactions.
+
+    ``lines`` are the cleaned data of VirtualTransactionForms. A line's
+    amount is a fixed amount or, with the percentage split, a percentage of
+    the real transaction's amount. A line without an amount receives the
+    remainder. All amounts are positive, whatever the sign of the real
+    transaction: the accounts of each line carry the direction. Raises
+    ``forms.ValidationError`` if the split does not fit a transaction.
+    """
+    remainder_lines = [line for line in lines if line.get('amount') is None]
+    if len(remainder_lines) > 1:
+        raise forms.ValidationError(_('Only one line may leave the amount empty to receive the remainder.'))
+
+    result = []
+    for real_transaction in real_transactions:
+        total = abs(real_transaction.amount)
+        amounts = []
+        for line in lines:
+            if line.get('amount') is None:
+                amounts.append(None)
+            elif line.get('split') == SplitType.PERCENTAGE:
+                amounts.append((total * abs(line['amount']) / 100).quantize(Decimal('0.01')))
+            else:
+                amounts.append(abs(line['amount']))
+        assigned = sum(amount for amount in amounts if amount is not None)
+        if assigned > total:
+            raise forms.ValidationError(
+                _('The split exceeds the amount of the transaction from {date} ({amount}).').format(
+                    date=real_transaction.value_datetime.date(), amount=real_transaction.amount,
+                )
+            )
+        amounts = [total - assigned if amount is None else amount for amount in amounts]
+        for line, amount in zip(lines, amounts):
+            result.append(VirtualTransaction(
+                real_transaction=real_transaction,
+                value_datetime=real_transaction.value_datetime,
+                source_account=line.get('source_account'),
+                destination_account=line.get('destination_account'),
+                member=line.get('member'),
+                amount=amount,
+            ))
+    return result
+
+
 class VirtualTransactionForm(forms.ModelForm):
     member_name = forms.CharField(widget=forms.HiddenInput(), required=False)
+    split = forms.ChoiceField(
+        choices=((SplitType.FIXED, _('Fixed amount')), (SplitType.PERCENTAGE, _('Percentage'))),
+        initial=SplitType.FIXED,
+        required=False,
+    )
 
     def __init__(self, *args, **kwargs):
         initial = kwargs.get('initial', {})
@@ -0,0 +1,20 @@
+from byro.bookkeeping.models import RealTransaction, RealTransactionSource
+from byro.common.jobs import register_job
+
+
+@register_job('bookkeeping.process_upload')
+def process_upload(job, source):
+    source = RealTransactionSource.objects.get(pk=source)
+    created = source.process(progress=job.set_progress)
+    return {'transactions': created, 'rows': source.rows_processed}
+
+
+@register_job('bookkeeping.match_upload')
+def match_upload(job, source):
+    source = RealTransactionSource.objects.get(pk=source)
+    # Matched transactions are left alone, also when the job is run again
+    transactions = source.transactions.filter(is_matched=False).order_by('pk')
+    job.set_progress(0, total=transactions.count())
+    report = RealTransaction.objects.derive_virtual_transactions(transactions.iterator(), progress=job.set_progress)
+    errors = {str(pk): error for pk, error in report.items() if error}
+    return {'success': len(report) - len(errors), 'errors': len(errors), 'report': errors}
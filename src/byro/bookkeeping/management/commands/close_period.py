@@ -0,0 +1,26 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from django.utils.timezone import make_aware
+
+from byro.bookkeeping.models import ClosedPeriodError, FiscalPeriod
+
+
+class Command(BaseCommand):
+    help = "Close the fiscal period ending on the given day and store the account balances"
+
+    def add_arguments(self, parser):
+        parser.add_argument('end', help='Last day of the period, as YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        end = parse_date(options['end'])
+        if not end:
+            raise CommandError('Please provide the last day of the period as YYYY-MM-DD.')
+        try:
+            period = FiscalPeriod.objects.close(make_aware(datetime.combine(end, time.max)))
+        except ClosedPeriodError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS('Closed the period up to {end:%Y-%m-%d} with {count} account snapshots.'.format(
+            end=end, count=period.snapshots.count(),
+        )))
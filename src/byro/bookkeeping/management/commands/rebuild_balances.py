@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from byro.bookkeeping.models import MemberBalance, VirtualTransaction
+
+
+class Command(BaseCommand):
+    help = "Rebuild the member balance ledger from all virtual transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true', dest='check',
+            help='Only compare the ledger with the virtual transactions, do not modify it.',
+        )
+
+    def check_ledger(self):
+        expected = {
+            key: tuple(values)
+            for key, values in MemberBalance.objects.compute(VirtualTransaction.objects.all()).items()
+        }
+        actual = {
+            (member_id, category, month): (incoming, outgoing)
+            for member_id, category, month, incoming, outgoing in MemberBalance.objects.values_list(
+                'member_id', 'account_category', 'month', 'incoming', 'outgoing',
+            )
+        }
+        mismatches = sorted(
+            key for key in set(expected) | set(actual)
+            if expected.get(key) != actual.get(key)
+        )
+        for member_id, category, month in mismatches:
+            self.stderr.write('Member {member_id}, {category}, {month:%Y-%m}: ledger has {actual}, transactions sum up to {expected}'.format(
+                member_id=member_id, category=category, month=month,
+                actual=actual.get((member_id, category, month)),
+                expected=expected.get((member_id, category, month)),
+            ))
+        if mismatches:
+            raise CommandError('{count} ledger entries do not match. Run this command without --check to rebuild the ledger.'.format(count=len(mismatches)))
+        self.stdout.write(self.style.SUCCESS('The ledger matches the virtual transactions.'))
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_ledger()
+            return
+        MemberBalance.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS('Rebuilt {count} ledger entries.'.format(count=MemberBalance.objects.count())))
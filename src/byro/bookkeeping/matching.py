@@ -0,0 +1,215 @@
+import json
+import re
+from collections import defaultdict, deque
+
+from django.apps import apps
+from django.conf import settings
+
+from byro.bookkeeping.models import Account, AccountCategory, VirtualTransaction
+
+WORD_RE = re.compile(r'\w+')
+WHITESPACE_RE = re.compile(r'\s+')
+NUMBER_CONTEXT_RE = re.compile(
+    r'\b(?:{})\w*\W{{0,3}}$'.format('|'.join(map(re.escape, settings.TRANSACTION_MATCHING_NUMBER_PREFIXES)))
+)
+
+
+class KeywordAutomaton:
+    """
+    Finds all occurrences of many keywords in a text in a single pass
+    (Aho-Corasick). Each keyword can carry any number of values.
+    """
+
+    def __init__(self):
+        self.transitions = [{}]
+        self.fallback = [0]
+        self.outputs = [[]]
+
+    def add(self, keyword: str, value):
+        state = 0
+        for char in keyword:
+            if char not in self.transitions[state]:
+                self.transitions.append({})
+                self.fallback.append(0)
+                self.outputs.append([])
+                self.transitions[state][char] = len(self.transitions) - 1
+            state = self.transitions[state][char]
+        self.outputs[state].append((len(keyword), value))
+
+    def build(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self.transitions[state].items():
+                queue.append(target)
+                fallback = self.fallback[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fallback[fallback]
+                self.fallback[target] = self.transitions[fallback].get(char, 0)
+                self.outputs[target] = self.outputs[target] + self.outputs[self.fallback[target]]
+        return self
+
+    def search(self, text: str, whole_words=False):
+        """
+        Yields the values of all keywords found in ``text``. With
+        ``whole_words``, keywords must not be part of a longer word.
+        """
+        for start, value in self.finditer(text, whole_words=whole_words):
+            yield value
+
+    def finditer(self, text: str, whole_words=False):
+        """
+        Like ``search``, but yields the start position of each keyword
+        together with its value.
+        """
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self.transitions[state]:
+                state = self.fallback[state]
+            state = self.transitions[state].get(char, 0)
+            for length, value in self.outputs[state]:
+                start = end - length
+                if whole_words and (
+                    (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum())
+                ):
+                    continue
+                yield start, value
+
+
+class MemberIndex:
+    """
+    An in-memory lookup of all members by membership number, name, and,
+    with the SEPA plugin, IBAN and mandate reference.
+
+    Short membership numbers easily occur in dates or amounts, so they only
+    count if they follow one of the ``TRANSACTION_MATCHING_NUMBER_PREFIXES``,
+    unless they have at least ``TRANSACTION_MATCHING_MIN_NUMBER_LENGTH``
+    characters.
+    """
+    # Matches on an account identifier outweigh the membership number, which
+    # in turn outweighs a full name.
+    ACCOUNT_SCORE = 4
+    NUMBER_SCORE = 2
+    NAME_SCORE = 1
+
+    def __init__(self):
+        from byro.members.models import Member
+
+        self.words = KeywordAutomaton()
+        self.identifiers = KeywordAutomaton()
+        self.name_tokens = {}
+        self.numbers = {}
+        for pk, number, name in Member.all_objects.values_list('pk', 'number', 'name').iterator():
+            if number:
+                self.numbers[pk] = number.lower()
+                self.words.add(number.lower(), ('number', pk))
+            tokens = {token for token in WORD_RE.findall((name or '').lower()) if len(token) > 2}
+            if len(tokens) > 1:
+                self.name_tokens[pk] = tokens
+                for token in tokens:
+                    self.words.add(token, ('name', pk))
+        if apps.is_installed('byro.plugins.sepa'):
+            MemberSepa = apps.get_model('sepa', 'MemberSepa')
+            for pk, iban, mandate_reference in MemberSepa.objects.values_list('member_id', 'iban', 'mandate_reference').iterator():
+                for identifier in (iban, mandate_reference):
+                    if identifier and len(identifier) > 4:
+                        self.identifiers.add(self.compact(identifier), ('account', pk))
+        self.words.build()
+        self.identifiers.build()
+
+    @staticmethod
+    def compact(text: str) -> str:
+        return WHITESPACE_RE.sub('', text).lower()
+
+    @staticmethod
+    def has_number_context(text: str, start: int, end: int) -> bool:
+        if end - start >= settings.TRANSACTION_MATCHING_MIN_NUMBER_LENGTH:
+            return True
+        return bool(NUMBER_CONTEXT_RE.search(text, max(start - 30, 0), start))
+
+    def find_member(self, text: str, identifier_text: str = ''):
+        """
+        Returns the primary key of the member that ``text`` most likely
+        refers to, or None if there is no unambiguous candidate. Account
+        identifiers are also looked up in ``identifier_text``.
+        """
+        scores = defaultdict(int)
+        for kind, pk in self.identifiers.search(self.compact(text + '\n' + identifier_text)):
+            scores[pk] = max(scores[pk], self.ACCOUNT_SCORE)
+        text = text.lower()
+        name_candidates = set()
+        for start, (kind, pk) in self.words.finditer(text, whole_words=True):
+            if kind == 'number':
+                if self.has_number_context(text, start, start + len(self.numbers[pk])):
+                    scores[pk] = max(scores[pk], self.NUMBER_SCORE)
+            else:
+                name_candidates.add(pk)
+        if name_candidates:
+            words = set(WORD_RE.findall(text))
+            for pk in name_candidates:
+                if self.name_tokens[pk] <= words:
+                    scores[pk] = max(scores[pk], self.NAME_SCORE)
+        if not scores:
+            return None
+        best = max(scores.values())
+        candidates = [pk for pk, score in scores.items() if score == best]
+        return candidates[0] if len(candidates) == 1 else None
+
+
+class TransactionMatcher:
+    """
+    The built-in matcher, used when no plugin derives virtual transactions.
+    Incoming payments are booked as membership fees of the member they
+    refer to, or as donations if their purpose contains one of the
+    ``TRANSACTION_MATCHING_DONATION_KEYWORDS``.
+    """
+
+    def __init__(self):
+        self.index = MemberIndex()
+        self.donation_keywords = KeywordAutomaton()
+        for keyword in settings.TRANSACTION_MATCHING_DONATION_KEYWORDS:
+            self.donation_keywords.add(keyword.lower(), keyword)
+        self.donation_keywords.build()
+        self.accounts = {
+            category: Account.objects.filter(account_category=category).order_by('pk').first()
+            for category in (AccountCategory.MEMBER_FEES, AccountCategory.MEMBER_DONATION)
+        }
+
+    def get_text(self, real_transaction) -> str:
+        return '\n'.join([real_transaction.originator or '', real_transaction.purpose or ''])
+
+    def get_identifier_text(self, real_transaction) -> str:
+        return json.dumps(real_transaction.data) if real_transaction.data else ''
+
+    def match(self, real_transaction):
+        if real_transaction.amount <= 0:
+            return ValueError('Only incoming payments can be matched automatically.')
+        member_id = self.index.find_member(
+            self.get_text(real_transaction), self.get_identifier_text(real_transaction),
+        )
+        if not member_id:
+            return ValueError('No unambiguous member found.')
+        is_donation = any(self.donation_keywords.search(real_transaction.purpose.lower(), whole_words=True))
+        account = self.accounts[AccountCategory.MEMBER_DONATION if is_donation else AccountCategory.MEMBER_FEES]
+        if not account:
+            return ValueError('There is no account for this kind of payment.')
+        return [VirtualTransaction(
+            destination_account=account,
+            member_id=member_id,
+            amount=real_transaction.amount,
+            value_datetime=real_transaction.value_datetime,
+        )]
+
+    def match_batch(self, real_transactions) -> dict:
+        """
+        Returns a dict in the format expected from receivers of
+        `derive_virtual_transactions_batch`. Transactions that have been
+        matched before keep their virtual transactions.
+        """
+        existing = defaultdict(list)
+        for virtual_transaction in VirtualTransaction.objects.filter(real_transaction__in=real_transactions):
+            existing[virtual_transaction.real_transaction_id].append(virtual_transaction)
+        return {
+            real_transaction: existing.get(real_transaction.pk) or self.match(real_transaction)
+            for real_transaction in real_transactions
+        }
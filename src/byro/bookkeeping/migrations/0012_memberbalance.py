@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 16:48
+from __future__ import unicode_literals
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_balances(apps, schema_editor):
+    from byro.bookkeeping.models.member_balance import MemberBalanceManager
+    MemberBalance = apps.get_model('bookkeeping', 'MemberBalance')
+    VirtualTransaction = apps.get_model('bookkeeping', 'VirtualTransaction')
+    values = MemberBalanceManager().compute(VirtualTransaction.objects.all())
+    MemberBalance.objects.bulk_create([
+        MemberBalance(
+            member_id=member_id,
+            account_category=category,
+            month=month,
+            incoming=incoming,
+            outgoing=outgoing,
+        )
+        for (member_id, category, month), (incoming, outgoing) in values.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0007_member_membership_type'),
+        ('bookkeeping', '0011_auto_20180303_1745'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberBalance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_category', models.CharField(choices=[('member_donation', 'Donation account'), ('member_fees', 'Membership fee account'), ('asset', 'Asset account'), ('liability', 'Liability account'), ('income', 'Income account'), ('expense', 'Expense account')], max_length=15)),
+                ('month', models.DateField()),
+                ('incoming', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('outgoing', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='members.Member')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='memberbalance',
+            unique_together=set([('member', 'account_category', 'month')]),
+        ),
+        migrations.RunPython(build_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:02
+from __future__ import unicode_literals
+
+import byro.common.models.auditable
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0012_memberbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('incoming', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('outgoing', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='bookkeeping.Account')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FiscalPeriod',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('end', models.DateTimeField(unique=True, verbose_name='End')),
+                ('closed', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            bases=(byro.common.models.auditable.Auditable, models.Model),
+        ),
+        migrations.AddField(
+            model_name='accountsnapshot',
+            name='period',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='bookkeeping.FiscalPeriod'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='accountsnapshot',
+            unique_together=set([('period', 'account')]),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:04
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0013_fiscalperiod'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realtransactionsource',
+            name='failures',
+            field=django.contrib.postgres.fields.jsonb.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='realtransactionsource',
+            name='rows_processed',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def compute_fingerprints(apps, schema_editor):
+    from byro.bookkeeping.models.real_transaction import compute_fingerprint
+    RealTransaction = apps.get_model('bookkeeping', 'RealTransaction')
+    seen = set()
+    rows = RealTransaction.objects.order_by('pk').values_list(
+        'pk', 'importer', 'value_datetime', 'amount', 'originator', 'purpose', 'data',
+    )
+    for pk, importer, *content in rows.iterator():
+        fingerprint = compute_fingerprint(*content)
+        if (importer, fingerprint) in seen:
+            # Duplicates imported before fingerprints existed stay without one
+            continue
+        seen.add((importer, fingerprint))
+        RealTransaction.objects.filter(pk=pk).update(fingerprint=fingerprint)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0014_realtransactionsource_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realtransaction',
+            name='fingerprint',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(compute_fingerprints, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='realtransaction',
+            unique_together=set([('importer', 'fingerprint')]),
+        ),
+    ]
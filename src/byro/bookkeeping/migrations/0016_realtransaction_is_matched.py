@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:09
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0015_realtransaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realtransaction',
+            name='is_matched',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunSQL(
+            'UPDATE bookkeeping_realtransaction SET is_matched = EXISTS ('
+            'SELECT 1 FROM bookkeeping_virtualtransaction v WHERE v.real_transaction_id = bookkeeping_realtransaction.id);',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX bookkeeping_realtransaction_unmatched ON bookkeeping_realtransaction (value_datetime, id) WHERE NOT is_matched;',
+            'DROP INDEX bookkeeping_realtransaction_unmatched;',
+        ),
+    ]
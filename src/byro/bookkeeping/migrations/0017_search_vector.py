@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:13
+from __future__ import unicode_literals
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0016_realtransaction_is_matched'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realtransaction',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='realtransaction',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='bookkeeping_search__35301b_gin'),
+        ),
+        migrations.RunSQL(
+            'CREATE TRIGGER bookkeeping_realtransaction_search_vector BEFORE INSERT OR UPDATE OF purpose, originator ON bookkeeping_realtransaction '
+            "FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger(search_vector, 'pg_catalog.simple', purpose, originator);",
+            'DROP TRIGGER bookkeeping_realtransaction_search_vector ON bookkeeping_realtransaction;',
+        ),
+        migrations.RunSQL(
+            "UPDATE bookkeeping_realtransaction SET search_vector = to_tsvector('pg_catalog.simple', coalesce(purpose, '') || ' ' || coalesce(originator, ''));",
+            migrations.RunSQL.noop,
+        ),
+    ]
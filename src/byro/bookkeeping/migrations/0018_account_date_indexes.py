@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:37
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0017_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='virtualtransaction',
+            index=models.Index(fields=['source_account', 'value_datetime'], name='bookkeeping_source__41d256_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='virtualtransaction',
+            index=models.Index(fields=['destination_account', 'value_datetime'], name='bookkeeping_destina_c05da6_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:39
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0018_account_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='realtransaction',
+            unique_together=set([]),
+        ),
+        migrations.RunSQL(
+            'UPDATE bookkeeping_realtransaction t SET fingerprint = NULL WHERE EXISTS ('
+            'SELECT 1 FROM bookkeeping_realtransaction o WHERE o.fingerprint = t.fingerprint '
+            "AND COALESCE(o.importer, '') = COALESCE(t.importer, '') AND o.id < t.id);",
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX bookkeeping_realtransaction_fingerprint ON bookkeeping_realtransaction '
+            "(COALESCE(importer, ''), fingerprint);",
+            'DROP INDEX bookkeeping_realtransaction_fingerprint;',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:42
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0019_fingerprint_without_importer'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='realtransaction',
+            index=models.Index(fields=['value_datetime', 'id'], name='bookkeeping_value_d_1d8214_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='virtualtransaction',
+            index=models.Index(fields=['value_datetime', 'id'], name='bookkeeping_value_d_ac3236_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0020_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'DROP INDEX bookkeeping_realtransaction_fingerprint;',
+            "CREATE UNIQUE INDEX bookkeeping_realtransaction_fingerprint ON bookkeeping_realtransaction "
+            "(COALESCE(importer, ''), fingerprint);",
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX bookkeeping_realtransaction_fingerprint ON bookkeeping_realtransaction '
+            '(importer, fingerprint) WHERE importer IS NOT NULL;',
+            'DROP INDEX bookkeeping_realtransaction_fingerprint;',
+        ),
+    ]
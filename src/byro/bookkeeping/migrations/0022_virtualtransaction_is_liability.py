@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:58
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookkeeping', '0021_fingerprint_of_imports_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='virtualtransaction',
+            name='is_liability',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from .account import Account, AccountCategory
+from .fiscal_period import AccountSnapshot, ClosedPeriodError, FiscalPeriod
+from .member_balance import MemberBalance
 from .real_transaction import (
     RealTransaction, RealTransactionSource, TransactionChannel,
 )
@@ -7,6 +9,10 @@ from .virtual_transaction import VirtualTransaction
 __all__ = (
     'Account',
     'AccountCategory',
+    'AccountSnapshot',
+    'ClosedPeriodError',
+    'FiscalPeriod',
+    'MemberBalance',
     'RealTransaction',
     'RealTransactionSource',
     'TransactionChannel',
@@ -1,7 +1,11 @@
+from datetime import datetime
+from decimal import Decimal
+
 from django.db import models
-from django.db.models import Q
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.decorators import classproperty
-from django.utils.timezone import now
+from django.utils.timezone import now, utc
 from django.utils.translation import ugettext_lazy as _
 
 from byro.common.models.auditable import Auditable
@@ -31,6 +35,58 @@ class AccountCategory(Choices):
         )
 
 
+# Earlier than any transaction, for comparisons with an optional date
+EPOCH = datetime.min.replace(tzinfo=utc)
+
+
+class AccountQuerySet(models.QuerySet):
+
+    def with_totals(self, start=None, end=None):
+        """
+        Annotates ``incoming``, ``outgoing`` and ``total_balance`` (the same
+        values as ``Account.total_in``, ``total_out`` and ``balance``) for
+        all accounts in a single query. ``end`` defaults to the current time.
+
+        Without ``start``, the totals are read from the snapshot of the last
+        closed fiscal period, and only later transactions are summed up.
+        """
+        from byro.bookkeeping.models import AccountSnapshot, FiscalPeriod, VirtualTransaction
+        end = end or now()
+        # The end of the last closed period, looked up within the same query
+        period_end = None
+        if not start:
+            period_end = Subquery(
+                FiscalPeriod.objects.filter(end__lte=end).order_by('-end').values('end')[:1],
+                output_field=models.DateTimeField(),
+            )
+
+        def total(field, side):
+            qs = VirtualTransaction.objects.filter(**{field: OuterRef('pk'), 'value_datetime__lte': end})
+            if start:
+                qs = qs.filter(value_datetime__gte=start)
+            else:
+                qs = qs.filter(value_datetime__gt=Coalesce(period_end, Value(EPOCH)))
+            qs = qs.order_by().values(field).annotate(total=models.Sum('amount')).values('total')
+            result = Coalesce(
+                Subquery(qs, output_field=models.DecimalField()),
+                Decimal('0.00'),
+            )
+            if not start:
+                snapshot = AccountSnapshot.objects.filter(period__end=period_end, account=OuterRef('pk')).values(side)
+                result = result + Coalesce(
+                    Subquery(snapshot, output_field=models.DecimalField()),
+                    Decimal('0.00'),
+                )
+            return result
+
+        return self.annotate(
+            incoming=total('destination_account', 'incoming'),
+            outgoing=total('source_account', 'outgoing'),
+        ).annotate(
+            total_balance=models.F('incoming') - models.F('outgoing'),
+        )
+
+
 class Account(Auditable, models.Model):
     account_category = models.CharField(
         choices=AccountCategory.choices,
@@ -38,6 +94,8 @@ class Account(Auditable, models.Model):
     )
     name = models.CharField(max_length=300, null=True)  # e.g. 'Laser donations'
 
+    objects = AccountQuerySet.as_manager()
+
     class Meta:
         unique_together = (
             ('account_category', 'name'),
@@ -55,23 +113,14 @@ class Account(Auditable, models.Model):
             Q(source_account=self) | Q(destination_account=self)
         )
 
-    def total_in(self, start=None, end=now()):
-        qs = self.incoming_transactions
-        if start:
-            qs = qs.filter(value_datetime__gte=start)
-        if end:
-            qs = qs.filter(value_datetime__lte=end)
-        return qs.aggregate(incoming=models.Sum('amount'))['incoming'] or 0
-
-    def total_out(self, start=None, end=now()):
-        qs = self.outgoing_transactions
-        if start:
-            qs = qs.filter(value_datetime__gte=start)
-        if end:
-            qs = qs.filter(value_datetime__lte=end)
-        return qs.aggregate(outgoing=models.Sum('amount'))['outgoing'] or 0
-
-    def balance(self, start=None, end=now()):
-        incoming_sum = self.total_in(start=start, end=end)
-        outgoing_sum = self.total_out(start=start, end=end)
-        return incoming_sum - outgoing_sum
+    def _totals(self, start=None, end=None):
+        return Account.objects.filter(pk=self.pk).with_totals(start=start, end=end).get()
+
+    def total_in(self, start=None, end=None):
+        return self._totals(start=start, end=end).incoming
+
+    def total_out(self, start=None, end=None):
+        return self._totals(start=start, end=end).outgoing
+
+    def balance(self, start=None, end=None):
+        return self._totals(start=start, end=end).total_balance
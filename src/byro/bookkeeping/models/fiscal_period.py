@@ -0,0 +1,72 @@
+from django.db import models, transaction
+from django.utils.timezone import now
+from django.utils.translation import ugettext_lazy as _
+
+from byro.common.models.auditable import Auditable
+
+
+class ClosedPeriodError(Exception):
+    pass
+
+
+class FiscalPeriodManager(models.Manager):
+
+    def closed_until(self):
+        return self.aggregate(end=models.Max('end'))['end']
+
+    @transaction.atomic
+    def close(self, end) -> 'FiscalPeriod':
+        """
+        Closes the period from the end of the previous period up to and
+        including ``end``, and stores the totals of all accounts at that
+        point. Transactions up to ``end`` cannot be changed afterwards.
+        """
+        from .account import Account
+
+        previous = self.select_for_update().order_by('-end').first()
+        if previous and end <= previous.end:
+            raise ClosedPeriodError('The period up to {end} has been closed already.'.format(end=previous.end))
+        if end > now():
+            raise ClosedPeriodError('Periods can only be closed in the past.')
+
+        accounts = list(Account.objects.with_totals(end=end))
+        period = self.create(end=end)
+        AccountSnapshot.objects.bulk_create(
+            AccountSnapshot(period=period, account=account, incoming=account.incoming, outgoing=account.outgoing)
+            for account in accounts
+        )
+        return period
+
+
+class FiscalPeriod(Auditable, models.Model):
+    end = models.DateTimeField(unique=True, verbose_name=_('End'))
+    closed = models.DateTimeField(default=now)
+
+    objects = FiscalPeriodManager()
+
+    def __str__(self):
+        return 'Fiscal period until {self.end:%Y-%m-%d}'.format(self=self)
+
+
+class AccountSnapshot(models.Model):
+    """
+    The total incoming and outgoing amounts of an account from the start of
+    bookkeeping up to the end of a closed fiscal period.
+    """
+    period = models.ForeignKey(
+        to='bookkeeping.FiscalPeriod',
+        related_name='snapshots',
+        on_delete=models.CASCADE,
+    )
+    account = models.ForeignKey(
+        to='bookkeeping.Account',
+        related_name='snapshots',
+        on_delete=models.CASCADE,
+    )
+    incoming = models.DecimalField(max_digits=12, decimal_places=2)
+    outgoing = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = (
+            ('period', 'account'),
+        )
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import models, transaction
+from django.db.models import Case, Q, Sum, When
+from django.db.models.functions import TruncMonth
+from django.utils.timezone import is_naive, localtime, make_aware
+
+from .account import AccountCategory
+
+
+def month_of(value) -> date:
+    if isinstance(value, datetime):
+        value = localtime(make_aware(value) if is_naive(value) else value).date()
+    return value.replace(day=1)
+
+
+def start_of(month: date) -> datetime:
+    return make_aware(datetime.combine(month, time.min))
+
+
+class MemberBalanceManager(models.Manager):
+
+    def compute(self, transactions) -> dict:
+        """
+        Aggregates a VirtualTransaction queryset into a dict mapping
+        ``(member_id, account_category, month)`` to ``[incoming, outgoing]``.
+        """
+        result = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00')])
+        transactions = transactions.filter(
+            member__isnull=False, value_datetime__isnull=False,
+        ).annotate(month=TruncMonth('value_datetime')).order_by()
+        for index, side in enumerate(('destination_account', 'source_account')):
+            rows = transactions.filter(**{side + '__isnull': False}).values_list(
+                'member_id', side + '__account_category', 'month',
+            ).annotate(total=Sum('amount'))
+            for member_id, category, month, total in rows:
+                result[(member_id, category, month.date())][index] += total
+        return result
+
+    def _create_from(self, values):
+        self.bulk_create([
+            MemberBalance(
+                member_id=member_id,
+                account_category=category,
+                month=month,
+                incoming=incoming,
+                outgoing=outgoing,
+            )
+            for (member_id, category, month), (incoming, outgoing) in values.items()
+        ], batch_size=1000)
+
+    def _lock_members(self, member_ids):
+        """
+        Locks the rows of the given members until the end of the database
+        transaction, so that concurrent refreshes of their buckets run one
+        after another instead of inserting the same bucket twice.
+        """
+        from byro.members.models import Member
+        list(Member.all_objects.select_for_update().filter(pk__in=member_ids).order_by('pk').values_list('pk'))
+
+    @transaction.atomic
+    def refresh(self, buckets):
+        """
+        Recomputes the given ``(member_id, month)`` buckets from the
+        VirtualTransactions they contain.
+        """
+        from byro.bookkeeping.models import VirtualTransaction
+        buckets = list(buckets)
+        self._lock_members({member_id for member_id, month in buckets})
+        for member_id, month in buckets:
+            values = self.compute(VirtualTransaction.objects.filter(
+                member_id=member_id,
+                value_datetime__gte=start_of(month),
+                value_datetime__lt=start_of(month + relativedelta(months=1)),
+            ))
+            self.filter(member_id=member_id, month=month).delete()
+            self._create_from(values)
+
+    @transaction.atomic
+    def refresh_members(self, member_ids, chunk_size=500):
+        """
+        Recomputes all buckets of the given members, e.g. after their
+        VirtualTransactions have been changed in bulk.
+        """
+        from byro.bookkeeping.models import VirtualTransaction
+        member_ids = sorted(set(member_ids))
+        for index in range(0, len(member_ids), chunk_size):
+            chunk = member_ids[index:index + chunk_size]
+            self._lock_members(chunk)
+            self.filter(member_id__in=chunk).delete()
+            self._create_from(self.compute(VirtualTransaction.objects.filter(member_id__in=chunk)))
+
+    @transaction.atomic
+    def rebuild(self):
+        from byro.bookkeeping.models import VirtualTransaction
+        self.all().delete()
+        self._create_from(self.compute(VirtualTransaction.objects.all()))
+
+    def balance(self, member, start, end, account_category=AccountCategory.MEMBER_FEES) -> Decimal:
+        """
+        Returns incoming minus outgoing amounts of the member in the given
+        account category between ``start`` and ``end`` (both inclusive).
+
+        Whole months are read from the ledger, only the partial months at
+        either end are aggregated from the VirtualTransactions themselves.
+        """
+        from byro.bookkeeping.models import VirtualTransaction
+        first_month = month_of(start) + relativedelta(months=1)
+        last_month = month_of(end)
+        if first_month <= last_month:
+            partial = (
+                Q(value_datetime__gte=start, value_datetime__lt=start_of(first_month)) |
+                Q(value_datetime__gte=start_of(last_month), value_datetime__lte=end)
+            )
+        else:
+            partial = Q(value_datetime__gte=start, value_datetime__lte=end)
+
+        ledger = self.filter(
+            member=member,
+            account_category=account_category,
+            month__gte=first_month,
+            month__lt=last_month,
+        ).aggregate(incoming=Sum('incoming'), outgoing=Sum('outgoing'))
+        live = VirtualTransaction.objects.filter(partial, member=member).aggregate(
+            incoming=Sum(Case(
+                When(destination_account__account_category=account_category, then='amount'),
+                default=0, output_field=models.DecimalField(),
+            )),
+            outgoing=Sum(Case(
+                When(source_account__account_category=account_category, then='amount'),
+                default=0, output_field=models.DecimalField(),
+            )),
+        )
+        return sum(
+            (values['incoming'] or Decimal('0.00')) - (values['outgoing'] or Decimal('0.00'))
+            for values in (ledger, live)
+        )
+
+
+class MemberBalance(models.Model):
+    """
+    Monthly totals of a member's VirtualTransactions per account category.
+
+    The table is derived data: it is updated whenever a VirtualTransaction
+    is saved or deleted, code changing VirtualTransactions in bulk has to
+    call ``MemberBalance.objects.refresh_members``. It can be regenerated
+    with the ``rebuild_balances`` management command.
+    """
+    member = models.ForeignKey(
+        to='members.Member',
+        related_name='balances',
+        on_delete=models.CASCADE,
+    )
+    account_category = models.CharField(
+        choices=AccountCategory.choices,
+        max_length=AccountCategory.max_length,
+    )
+    month = models.DateField()
+    incoming = models.DecimalField(
+        max_digits=12, decimal_places=2,
+        default=Decimal('0.00'),
+    )
+    outgoing = models.DecimalField(
+        max_digits=12, decimal_places=2,
+        default=Decimal('0.00'),
+    )
+
+    objects = MemberBalanceManager()
+
+    class Meta:
+        unique_together = (
+            ('member', 'account_category', 'month'),
+        )
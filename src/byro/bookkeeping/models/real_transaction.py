@@ -1,5 +1,19 @@
+import csv
+import hashlib
+import io
+import json
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
 from django.contrib.postgres.fields import JSONField
-from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.sql import InsertQuery
+from django.utils.timezone import is_naive, localtime, make_aware
 
 from byro.common.models.auditable import Auditable
 from byro.common.models.choices import Choices
@@ -14,40 +28,146 @@ class SourceState(Choices):
     valid_choices = [NEW, PROCESSING, PROCESSED, FAILED]
 
 
+def send_to_single_plugin(signal, sender, action: str):
+    """
+    Sends ``signal`` and returns the receiver and response of the one plugin
+    answering it, or ``(None, None)`` if there is none. Raises an exception
+    if more than one plugin answered, and re-raises a received Exception.
+    """
+    responses = signal.send_robust(sender=sender)
+    if len(responses) > 1:
+        raise Exception('More than one plugin tried to {action}: {receivers}'.format(
+            action=action, receivers=[r[0].__module__ + '.' + r[0].__name__ for r in responses],
+        ))
+    if not responses:
+        return None, None
+    receiver, response = responses[0]
+    if isinstance(response, Exception):
+        raise response
+    return receiver, response
+
+
 class RealTransactionSource(Auditable, models.Model):
     source_file = models.FileField(upload_to='transaction_uploads/')
     state = models.CharField(default=SourceState.NEW, choices=SourceState.choices, max_length=SourceState.max_length)
+    rows_processed = models.IntegerField(default=0)
+    failures = JSONField(default=list)
 
-    @transaction.atomic
-    def process(self):
+    def read_rows(self, encoding='utf-8', **kwargs):
+        """
+        Yields the rows of the uploaded CSV file as dicts, without loading the
+        whole file into memory. Keyword arguments are passed to ``csv.DictReader``.
+        """
+        self.source_file.open('rb')
+        try:
+            yield from csv.DictReader(io.TextIOWrapper(self.source_file, encoding=encoding, newline=''), **kwargs)
+        finally:
+            self.source_file.close()
+
+    def process(self, batch_size=None, progress=None) -> int:
         """
         Collects responses to the signal `process_csv_upload`. Raises an
         exception if multiple results were found, and re-raises received Exceptions.
 
-        Returns a list of one or more RealTransaction objects if no Exception
-        was raised.
+        The response may be any iterable of RealTransaction objects, e.g. a
+        generator over ``read_rows``. Unsaved objects are created in batches of
+        ``batch_size``, each in its own database transaction. If processing
+        stops with an error or crashes, calling this method again continues
+        after the last committed batch. ``progress`` is called with the number
+        of processed rows after each batch.
+
+        Receivers returning a list may have saved its transactions
+        themselves, so such a response is imported in a single database
+        transaction, together with the receiver call.
+
+        Returns the number of created RealTransaction objects.
         """
+        batch_size = batch_size or settings.TRANSACTION_IMPORT_BATCH_SIZE
+        if self.state not in (SourceState.PROCESSING, SourceState.FAILED):
+            self.rows_processed = 0
         self.state = SourceState.PROCESSING
         self.save()
-        from byro.bookkeeping.signals import process_csv_upload
-        responses = process_csv_upload.send_robust(sender=self)
-        if len(responses) > 1:
-            self.state = SourceState.FAILED
-            self.save()
-            raise Exception('More than one plugin tried to process the CSV upload: {}'.format([r[0].__module__ + '.' + r[0].__name__ for r in responses]))
-        if len(responses) < 1:
-            self.state = SourceState.FAILED
-            self.save()
-            raise Exception('No plugin tried to process the CSV upload.')
-        receiver, response = responses[0]
 
-        if isinstance(response, Exception):
+        rows_processed = self.rows_processed
+        self._failed_row = None
+        is_list = False
+        try:
+            with transaction.atomic():
+                response = self._get_response()
+                is_list = isinstance(response, (list, tuple))
+                if is_list:
+                    created = self._import_rows(response, batch_size, progress)
+            if not is_list:
+                created = self._import_rows(response, batch_size, progress)
+        except Exception as e:
+            if self._failed_row is not None:
+                self.failures.append({'row': self._failed_row, 'error': str(e) or repr(e)})
+            if is_list:
+                self.rows_processed = rows_processed
             self.state = SourceState.FAILED
             self.save()
-            raise response
+            raise
         self.state = SourceState.PROCESSED
         self.save()
-        return response
+        return created
+
+    def _get_response(self):
+        from byro.bookkeeping.signals import process_csv_upload
+        receiver, response = send_to_single_plugin(process_csv_upload, self, 'process the CSV upload')
+        if not receiver:
+            raise Exception('No plugin tried to process the CSV upload.')
+        return response or []
+
+    def _import_rows(self, response, batch_size, progress) -> int:
+        created = 0
+        rows = islice(response, self.rows_processed, None)
+        while True:
+            batch = []
+            try:
+                for row in islice(rows, batch_size):
+                    batch.append(row)
+            except Exception:
+                self._failed_row = self.rows_processed + len(batch)
+                raise
+            if not batch:
+                break
+            try:
+                created += self._import_batch(batch)
+            except Exception:
+                self._failed_row = self.rows_processed + self._find_failing_row(batch)
+                raise
+            if progress:
+                progress(self.rows_processed)
+        return created
+
+    @transaction.atomic
+    def _import_batch(self, batch) -> int:
+        new_transactions = [real_transaction for real_transaction in batch if real_transaction.pk is None]
+        for real_transaction in new_transactions:
+            real_transaction.source = self
+        created = RealTransaction.objects.bulk_create_new(new_transactions)
+        RealTransactionSource.objects.filter(pk=self.pk).update(rows_processed=self.rows_processed + len(batch))
+        self.rows_processed += len(batch)
+        return created
+
+    def _find_failing_row(self, batch) -> int:
+        """
+        Returns the index of the first transaction in ``batch`` that cannot
+        be inserted, trying each in a savepoint that is rolled back.
+        """
+        for index, real_transaction in enumerate(batch):
+            if real_transaction.pk is not None:
+                continue
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        RealTransaction.objects.bulk_create_new([real_transaction])
+                except Exception:
+                    return index
+                finally:
+                    real_transaction.pk = None
+                    transaction.set_rollback(True)
+        return 0
 
 
 class TransactionChannel(Choices):
@@ -57,6 +177,139 @@ class TransactionChannel(Choices):
     valid_choices = [BANK, CASH]
 
 
+def compute_fingerprint(value_datetime, amount, originator, purpose, data) -> str:
+    """
+    Returns a hash over the content of a bank transaction, which is stable
+    across repeated exports of the same transaction. Accepts the same
+    values as the model fields, e.g. naive datetimes and string amounts.
+    """
+    value_datetime = models.DateTimeField().to_python(value_datetime)
+    if is_naive(value_datetime):
+        value_datetime = make_aware(value_datetime)
+    content = json.dumps([
+        localtime(value_datetime).date().isoformat(),
+        '{:.2f}'.format(Decimal(str(amount))),
+        originator,
+        purpose,
+        data,
+    ], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class RealTransactionManager(models.Manager):
+
+    def bulk_create_new(self, transactions) -> int:
+        """
+        Inserts the given RealTransactions. Those with an importer are
+        skipped if they have been imported before with the same importer and
+        fingerprint, or repeat within ``transactions``. Transactions without
+        an importer are always created, since identical payments, e.g. cash
+        donations, are legitimate. Created objects get their primary key set,
+        skipped ones keep ``None``. Returns the number of created objects.
+        """
+        unique = {}
+        manual = []
+        for real_transaction in transactions:
+            if not real_transaction.fingerprint:
+                real_transaction.fingerprint = real_transaction.compute_fingerprint()
+            if real_transaction.importer is None:
+                manual.append(real_transaction)
+            else:
+                unique.setdefault((real_transaction.importer, real_transaction.fingerprint), real_transaction)
+        if manual:
+            self.bulk_create(manual)
+        transactions = list(unique.values())
+        if not transactions:
+            return len(manual)
+
+        query = InsertQuery(self.model)
+        query.insert_values(
+            [field for field in self.model._meta.concrete_fields if field is not self.model._meta.auto_field],
+            transactions,
+        )
+        created = {}
+        with connections[self.db].cursor() as cursor:
+            for sql, params in query.get_compiler(using=self.db).as_sql():
+                cursor.execute(sql + ' ON CONFLICT DO NOTHING RETURNING "id", "importer", "fingerprint"', params)
+                created.update(((importer, fingerprint), pk) for pk, importer, fingerprint in cursor.fetchall())
+        for key, real_transaction in unique.items():
+            real_transaction.pk = created.get(key)
+        return len(manual) + len(created)
+
+    def update_matched(self, pks):
+        """
+        Recomputes ``is_matched`` for the RealTransactions with the given
+        primary keys.
+        """
+        from byro.bookkeeping.models import VirtualTransaction
+        pks = {pk for pk in pks if pk}
+        if pks:
+            self.filter(pk__in=pks).update(is_matched=Exists(
+                VirtualTransaction.objects.filter(real_transaction=OuterRef('pk')),
+            ))
+
+    def derive_virtual_transactions(self, transactions, batch_size=500, progress=None) -> dict:
+        """
+        Matches many RealTransactions at once. The transactions are handed to
+        the receiver of `derive_virtual_transactions_batch` in batches of
+        ``batch_size``. If there is none, each transaction is sent to the
+        single-item signal `derive_virtual_transactions` instead. If no
+        plugin answers either signal, the built-in TransactionMatcher is used.
+
+        Unsaved VirtualTransactions in the responses are created with one
+        bulk insert per batch. Returns a dict mapping the primary key of each
+        RealTransaction to ``None`` if it was matched, or to an error message.
+        ``progress`` is called with the number of handled transactions after
+        each batch.
+        """
+        from byro.bookkeeping.matching import TransactionMatcher
+        from byro.bookkeeping.models import FiscalPeriod, VirtualTransaction
+        from byro.bookkeeping.signals import derive_virtual_transactions, derive_virtual_transactions_batch
+
+        matcher = None
+        closed_until = FiscalPeriod.objects.closed_until()
+        report = {}
+        transactions = iter(transactions)
+        while True:
+            batch = list(islice(transactions, batch_size))
+            if not batch:
+                break
+            receiver, response = send_to_single_plugin(
+                derive_virtual_transactions_batch, tuple(batch), 'derive virtual transactions',
+            )
+            if receiver is None and not derive_virtual_transactions.has_listeners():
+                matcher = matcher or TransactionMatcher()
+                response = matcher.match_batch(batch)
+            elif receiver is None:
+                response = {}
+                for real_transaction in batch:
+                    try:
+                        response[real_transaction] = real_transaction.derive_virtual_transactions()
+                    except Exception as e:
+                        response[real_transaction] = e
+
+            new_transactions = []
+            for real_transaction in batch:
+                result = response.get(real_transaction)
+                if isinstance(result, Exception):
+                    report[real_transaction.pk] = str(result) or repr(result)
+                elif not result:
+                    report[real_transaction.pk] = 'Transaction could not be matched'
+                elif closed_until and any(vt.pk is None and vt.value_datetime and vt.value_datetime <= closed_until for vt in result):
+                    report[real_transaction.pk] = 'Transaction belongs to a closed fiscal period'
+                else:
+                    for virtual_transaction in result:
+                        if virtual_transaction.pk is None:
+                            virtual_transaction.real_transaction = real_transaction
+                            new_transactions.append(virtual_transaction)
+                    report[real_transaction.pk] = None
+
+            VirtualTransaction.objects.create_bulk(new_transactions)
+            if progress:
+                progress(len(report))
+        return report
+
+
 class RealTransaction(Auditable, models.Model):
     channel = models.CharField(
         choices=TransactionChannel.choices,
@@ -82,6 +335,36 @@ class RealTransaction(Auditable, models.Model):
         related_name='transactions',
         null=True,
     )
+    fingerprint = models.CharField(max_length=64, null=True)
+    # Whether any VirtualTransaction refers to this transaction. Maintained
+    # by RealTransaction.objects.update_matched.
+    is_matched = models.BooleanField(default=False)
+    # Maintained by a database trigger from purpose and originator
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RealTransactionManager()
+
+    class Meta:
+        # Imported transactions are unique by importer and fingerprint, by a
+        # partial index WHERE importer IS NOT NULL, see migration 0021.
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            # Transaction lists are paginated by (value_datetime, id)
+            models.Index(fields=['value_datetime', 'id']),
+        ]
+
+    def compute_fingerprint(self) -> str:
+        return compute_fingerprint(self.value_datetime, self.amount, self.originator, self.purpose, self.data)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Keep is_matched as maintained by update_matched, which this
+            # instance may not have seen
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'is_matched'
+            ]
+        super().save(*args, **kwargs)
 
     @transaction.atomic
     def derive_virtual_transactions(self):
@@ -93,15 +376,9 @@ class RealTransaction(Auditable, models.Model):
         was raised.
         """
         from byro.bookkeeping.signals import derive_virtual_transactions
-        responses = derive_virtual_transactions.send_robust(sender=self)
-        if len(responses) > 1:
-            raise Exception('More than one plugin tried to derive virtual transactions: {}'.format([r[0].__module__ + '.' + r[0].__name__ for r in responses]))
-        if len(responses) < 1:
+        receiver, response = send_to_single_plugin(derive_virtual_transactions, self, 'derive virtual transactions')
+        if not receiver:
             raise Exception('No plugin tried to derive virtual transactions.')
-        receiver, response = responses[0]
-
-        if isinstance(response, Exception):
-            raise response
 
         if not isinstance(response, list) or len(response) == 0:
             raise Exception('Transaction could not be matched')
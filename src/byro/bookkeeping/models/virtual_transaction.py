@@ -1,7 +1,32 @@
-from django.db import models
+from django.db import models, transaction
 
 from byro.common.models.auditable import Auditable
 
+from .member_balance import month_of
+
+
+class VirtualTransactionManager(models.Manager):
+
+    @transaction.atomic
+    def create_bulk(self, transactions) -> list:
+        """
+        Creates the given VirtualTransactions with a single bulk insert and
+        updates the data derived from them, which ``bulk_create`` alone
+        would skip: the member balance ledger, ``RealTransaction.is_matched``
+        and the cached dashboard metrics.
+        Raises ClosedPeriodError if any of them lies in a closed fiscal period.
+        """
+        from byro.bookkeeping.models import MemberBalance, RealTransaction
+        from byro.bookkeeping.signals import check_open_period
+        from byro.office.views.dashboard import invalidate_dashboard_metrics
+        transactions = list(transactions)
+        check_open_period(*(vt.value_datetime for vt in transactions))
+        self.bulk_create(transactions)
+        RealTransaction.objects.update_matched({vt.real_transaction_id for vt in transactions})
+        MemberBalance.objects.refresh_members({vt.member_id for vt in transactions if vt.member_id})
+        invalidate_dashboard_metrics()
+        return transactions
+
 
 class VirtualTransaction(Auditable, models.Model):
     real_transaction = models.ForeignKey(
@@ -33,3 +58,35 @@ class VirtualTransaction(Auditable, models.Model):
         max_digits=8, decimal_places=2,  # TODO: enforce min_value = 0
     )
     value_datetime = models.DateTimeField(null=True)
+    # Set on the fee liabilities booked by byro.members.liabilities, which
+    # corrects or removes them when the memberships change
+    is_liability = models.BooleanField(default=False, editable=False)
+
+    objects = VirtualTransactionManager()
+
+    class Meta:
+        indexes = [
+            # Account totals sum up the transactions of an account by date
+            models.Index(fields=['source_account', 'value_datetime']),
+            models.Index(fields=['destination_account', 'value_datetime']),
+            # Transaction lists are paginated by (value_datetime, id)
+            models.Index(fields=['value_datetime', 'id']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_balance_buckets = instance.balance_buckets
+        instance._loaded_value_datetime = instance.value_datetime
+        instance._loaded_real_transaction_id = instance.real_transaction_id
+        return instance
+
+    @property
+    def balance_buckets(self) -> set:
+        """
+        The ``(member_id, month)`` buckets of the MemberBalance ledger this
+        transaction is counted in.
+        """
+        if not self.member_id or not self.value_datetime:
+            return set()
+        return {(self.member_id, month_of(self.value_datetime))}
@@ -1,4 +1,13 @@
 import django.dispatch
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from byro.bookkeeping.models import (
+    ClosedPeriodError, FiscalPeriod, MemberBalance,
+    RealTransaction, VirtualTransaction,
+)
 
 derive_virtual_transactions = django.dispatch.Signal(providing_args=[])
 """
@@ -10,11 +19,72 @@ case of any other issues an Exception must be raised.
 If the RealTransaction has already been matched, you probably should not alter
 the matched VirtualTransactions or create new ones.
 """
+derive_virtual_transactions_batch = django.dispatch.Signal(providing_args=[])
+"""
+This signal provides a tuple of RealTransactions as sender, so that matchers
+can look up members and accounts once per batch. It expects a dict mapping
+RealTransactions to a list of VirtualTransactions in response. Unsaved
+VirtualTransactions are created in bulk, with their real_transaction set.
+Map a RealTransaction to an Exception to report why it could not be matched;
+transactions missing from the dict are reported as unmatched.
+
+If no plugin answers this signal, `derive_virtual_transactions` is sent for
+each RealTransaction instead.
+"""
 process_csv_upload = django.dispatch.Signal(providing_args=[])
 """
-This signal provides a RealTransactionSource as sender and expects a list of
-one or more RealTransactions in response.
+This signal provides a RealTransactionSource as sender and expects an iterable
+of RealTransactions in response. Unsaved RealTransactions are created in
+batches, so receivers should read the file with `sender.read_rows()` and
+yield one RealTransaction per row instead of building a list.
+When processing is resumed, the rows already imported are skipped, so the
+response has to yield the rows in the same order each time.
+A list in response is imported in a single database transaction together
+with the receiver call, so receivers that save their transactions themselves
+leave nothing behind if they fail.
 
 If the RealTransactionSource has already been processed, no RealTransactions
 should be created, unless you are very sure what you are doing.
 """
+
+
+def check_open_period(*value_datetimes):
+    closed_until = FiscalPeriod.objects.closed_until()
+    if closed_until and any(value and value <= closed_until for value in value_datetimes):
+        raise ClosedPeriodError('Transactions up to {end} belong to a closed fiscal period and cannot be changed.'.format(end=closed_until))
+
+
+@receiver(pre_save, sender=VirtualTransaction)
+def protect_closed_period_on_save(sender, instance, **kwargs):
+    check_open_period(instance.value_datetime, getattr(instance, '_loaded_value_datetime', None))
+
+
+@receiver(pre_delete, sender=VirtualTransaction)
+def protect_closed_period_on_delete(sender, instance, **kwargs):
+    check_open_period(instance.value_datetime)
+
+
+@receiver(post_save, sender=VirtualTransaction)
+def update_member_balance_on_save(sender, instance, **kwargs):
+    buckets = instance.balance_buckets | getattr(instance, '_loaded_balance_buckets', set())
+    MemberBalance.objects.refresh(buckets)
+    instance._loaded_balance_buckets = instance.balance_buckets
+    instance._loaded_value_datetime = instance.value_datetime
+
+
+@receiver(post_delete, sender=VirtualTransaction)
+def update_member_balance_on_delete(sender, instance, **kwargs):
+    MemberBalance.objects.refresh(instance.balance_buckets)
+
+
+@receiver(post_save, sender=VirtualTransaction)
+def update_matched_on_save(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_real_transaction_id', None)
+    if kwargs.get('created') or loaded != instance.real_transaction_id:
+        RealTransaction.objects.update_matched({instance.real_transaction_id, loaded})
+    instance._loaded_real_transaction_id = instance.real_transaction_id
+
+
+@receiver(post_delete, sender=VirtualTransaction)
+def update_matched_on_delete(sender, instance, **kwargs):
+    RealTransaction.objects.update_matched({instance.real_transaction_id})
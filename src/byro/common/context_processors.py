@@ -1,10 +1,10 @@
-from contextlib import suppress
-
 from django.conf import settings
 from django.http import Http404
 from django.urls import resolve
+from django.utils.functional import SimpleLazyObject
 
 from byro.common.models import Configuration
+from byro.common.version import get_version_info
 from byro.mails.models import EMail
 from byro.office.signals import nav_event
 
@@ -12,7 +12,8 @@ from byro.office.signals import nav_event
 def byro_information(request):
     ctx = {
         'config': Configuration.get_solo(),
-        'pending_mails': EMail.objects.filter(sent__isnull=True).count(),
+        # Only counted if the template actually shows the badge
+        'pending_mails': SimpleLazyObject(EMail.objects.filter(sent__isnull=True).count),
     }
 
     try:
@@ -22,9 +23,7 @@ def byro_information(request):
 
     if settings.DEBUG:
         ctx['development_warning'] = True
-        with suppress(Exception):
-            import subprocess
-            ctx['byro_version'] = subprocess.check_output(['git', 'describe', '--always'])
+        ctx['byro_version'] = get_version_info()['commit']
 
     return ctx
 
@@ -0,0 +1,40 @@
+"""
+Registry for background jobs.
+
+Apps and plugins register job functions in a ``jobs`` module, which is
+discovered on startup. A job function receives the running
+:class:`byro.common.models.Job` and the keyword arguments it was enqueued
+with, and returns a JSON serializable result::
+
+    from byro.common.jobs import register_job
+
+    @register_job('myplugin.export')
+    def export(job, year):
+        ...
+        job.set_progress(done, total=total)
+        ...
+        return {'rows': total}
+
+Enqueue it with ``Job.enqueue('myplugin.export', year=2018)``; the jobs
+are executed by ``manage.py byro_worker``.
+"""
+_registry = {}
+
+
+def register_job(name: str, max_attempts: int = 3):
+    """
+    Registers a job function. Jobs that must not run twice, e.g. because
+    they import data, should be registered with ``max_attempts=1``.
+    """
+    def decorator(function):
+        function.max_attempts = max_attempts
+        _registry[name] = function
+        return function
+    return decorator
+
+
+def get_job_function(name: str):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise KeyError('No job has been registered as {name}.'.format(name=name))
@@ -0,0 +1,69 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from byro.common.models import Job
+
+
+class Heartbeat(threading.Thread):
+    """
+    Keeps a job from being considered stale while this worker is running
+    it, even if the job itself does not report any progress.
+    """
+
+    def __init__(self, job, interval: float):
+        super().__init__(daemon=True)
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                Job.objects.heartbeat(self.job.pk)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true', dest='once',
+            help='Exit as soon as the queue is empty.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2, dest='sleep',
+            help='Seconds to wait before polling an empty queue again.',
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=600, dest='stale_after',
+            help='Requeue running jobs that have not reported progress for this many seconds.',
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            Job.objects.requeue_stale(stale_after)
+            job = Job.objects.fetch()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+            self.stdout.write('Running {job} (attempt {job.attempts})'.format(job=job))
+            heartbeat = Heartbeat(job, interval=stale_after.total_seconds() / 4)
+            heartbeat.start()
+            try:
+                job.run()
+            finally:
+                heartbeat.stop()
+            self.stdout.write('Finished {job}'.format(job=job))
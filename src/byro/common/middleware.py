@@ -1,11 +1,16 @@
 from django.shortcuts import redirect, reverse
 from django.urls import resolve
 
+from byro.common.models.configuration import (
+    end_request_cache, start_request_cache,
+)
+
 
 class PermissionMiddleware:
     UNAUTHENTICATED_URLS = (
         'login',
         'logout',
+        'health',
     )
 
     def __init__(self, get_response):
@@ -16,3 +21,20 @@ class PermissionMiddleware:
         if request.user.is_anonymous and url.url_name not in self.UNAUTHENTICATED_URLS:
             return redirect(reverse('common:login') + '?next={request.path}'.format(request=request))
         return self.get_response(request)
+
+
+class ConfigurationCacheMiddleware:
+    """
+    Makes Configuration.get_solo() return the same object throughout a
+    request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start_request_cache()
+        try:
+            return self.get_response(request)
+        finally:
+            end_request_cache()
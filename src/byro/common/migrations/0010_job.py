@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 16:53
+from __future__ import unicode_literals
+
+import byro.common.models.auditable
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0009_mail_templates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Job')),
+                ('arguments', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+                ('state', models.CharField(choices=[('queued', 'queued'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], db_index=True, default='queued', max_length=7)),
+                ('queued', models.DateTimeField(default=django.utils.timezone.now)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started', models.DateTimeField(null=True)),
+                ('heartbeat', models.DateTimeField(null=True)),
+                ('finished', models.DateTimeField(null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=3)),
+                ('progress', models.IntegerField(default=0)),
+                ('progress_total', models.IntegerField(null=True)),
+                ('result', django.contrib.postgres.fields.jsonb.JSONField(null=True)),
+                ('error', models.TextField(null=True)),
+            ],
+            bases=(byro.common.models.auditable.Auditable, models.Model),
+        ),
+    ]
@@ -1,3 +1,4 @@
 from .configuration import Configuration
+from .job import Job, JobState
 
-__all__ = ['Configuration']
+__all__ = ['Configuration', 'Job', 'JobState']
@@ -1,9 +1,25 @@
+from copy import deepcopy
+from threading import local
+from time import monotonic
+
 from django.conf.global_settings import LANGUAGES
 from django.contrib.postgres.fields import JSONField
-from django.db import models
+from django.core.cache import cache
+from django.db import connection, models, transaction
 from django.utils.translation import ugettext_lazy as _
 from solo.models import SingletonModel
 
+_request_cache = local()
+_process_cache = {}
+
+
+def start_request_cache():
+    _request_cache.instances = {}
+
+
+def end_request_cache():
+    _request_cache.instances = None
+
 
 class Configuration(SingletonModel):
 
@@ -83,3 +99,57 @@ class Configuration(SingletonModel):
         on_delete=models.SET_NULL,
         related_name='+',
     )
+
+    # Upper bound for serving a stale configuration if the cache backend
+    # is not shared between processes
+    process_cache_timeout = 60
+
+    @classmethod
+    def _version_key(cls):
+        return 'byro_configuration_version:{}'.format(cls.__name__.lower())
+
+    @classmethod
+    def get_solo(cls):
+        """
+        Returns the configuration, cached for the current request and for
+        the process. The process-level copy is dropped as soon as another
+        process saves the configuration and increments the version counter
+        in the shared cache.
+        """
+        instances = getattr(_request_cache, 'instances', None)
+        if instances and cls in instances:
+            return instances[cls]
+
+        version = cache.get(cls._version_key(), 0)
+        cached = _process_cache.get(cls)
+        if cached and cached[0] == version and cached[1] > monotonic():
+            obj = deepcopy(cached[2])
+        else:
+            obj = super().get_solo()
+            # Reads within a transaction might see changes that get rolled back
+            if not connection.in_atomic_block:
+                _process_cache[cls] = (version, monotonic() + cls.process_cache_timeout, deepcopy(obj))
+
+        if instances is not None:
+            instances[cls] = obj
+        return obj
+
+    @classmethod
+    def clear_cache(cls):
+        super().clear_cache()
+        _process_cache.pop(cls, None)
+        if getattr(_request_cache, 'instances', None):
+            _request_cache.instances.pop(cls, None)
+
+    @classmethod
+    def _increment_version(cls):
+        cls.clear_cache()
+        try:
+            cache.incr(cls._version_key())
+        except ValueError:
+            cache.set(cls._version_key(), 1, None)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.clear_cache()
+        transaction.on_commit(self._increment_version)
@@ -0,0 +1,139 @@
+import traceback
+from datetime import timedelta
+
+from django.contrib.postgres.fields import JSONField
+from django.db import models, transaction
+from django.db.models import F
+from django.utils.timezone import now
+from django.utils.translation import ugettext_lazy as _
+
+from byro.common.models.auditable import Auditable
+from byro.common.models.choices import Choices
+
+
+class JobState(Choices):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    valid_choices = [QUEUED, RUNNING, DONE, FAILED]
+
+
+class JobManager(models.Manager):
+
+    def fetch(self):
+        """
+        Claims the next runnable job for this worker, or returns None.
+        Concurrent workers skip rows locked by each other.
+        """
+        with transaction.atomic():
+            job = self.select_for_update(skip_locked=True).filter(
+                state=JobState.QUEUED, run_after__lte=now(),
+            ).order_by('run_after', 'pk').first()
+            if job:
+                job.state = JobState.RUNNING
+                job.attempts += 1
+                job.started = job.heartbeat = now()
+                job.save(update_fields=['state', 'attempts', 'started', 'heartbeat'])
+            return job
+
+    def requeue_stale(self, timeout: timedelta) -> int:
+        """
+        Puts jobs back into the queue whose worker has not sent a heartbeat
+        for ``timeout``, e.g. because it was killed. Jobs that have used up
+        their attempts are marked as failed instead, so that they never run
+        more often than ``max_attempts``.
+        """
+        stale = self.filter(state=JobState.RUNNING, heartbeat__lt=now() - timeout)
+        stale.filter(attempts__gte=F('max_attempts')).update(
+            state=JobState.FAILED, finished=now(), error='The worker running this job stopped responding.',
+        )
+        return stale.update(state=JobState.QUEUED, run_after=now())
+
+    def heartbeat(self, pk):
+        self.filter(pk=pk, state=JobState.RUNNING).update(heartbeat=now())
+
+
+class Job(Auditable, models.Model):
+    name = models.CharField(max_length=200, verbose_name=_('Job'))
+    arguments = JSONField(default=dict)
+    state = models.CharField(
+        default=JobState.QUEUED,
+        choices=JobState.choices,
+        max_length=JobState.max_length,
+        db_index=True,
+    )
+    queued = models.DateTimeField(default=now)
+    run_after = models.DateTimeField(default=now)
+    started = models.DateTimeField(null=True)
+    heartbeat = models.DateTimeField(null=True)
+    finished = models.DateTimeField(null=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    progress = models.IntegerField(default=0)
+    progress_total = models.IntegerField(null=True)
+    result = JSONField(null=True)
+    error = models.TextField(null=True)
+
+    objects = JobManager()
+
+    retry_delay = timedelta(seconds=30)
+
+    def __str__(self):
+        return '{self.name} #{self.pk} ({self.state})'.format(self=self)
+
+    @classmethod
+    def enqueue(cls, name: str, **arguments) -> 'Job':
+        from byro.common.jobs import get_job_function
+        function = get_job_function(name)
+        return cls.objects.create(name=name, arguments=arguments, max_attempts=function.max_attempts)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in (JobState.DONE, JobState.FAILED)
+
+    @property
+    def percentage(self):
+        if not self.progress_total:
+            return None
+        return min(100, int(self.progress * 100 / self.progress_total))
+
+    def set_progress(self, progress: int, total: int = None):
+        self.progress = progress
+        if total is not None:
+            self.progress_total = total
+        self.heartbeat = now()
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, progress_total=self.progress_total, heartbeat=self.heartbeat,
+        )
+
+    def run(self):
+        """
+        Runs the job function and records its result. Failed jobs are queued
+        again with an exponential backoff until ``max_attempts`` is reached.
+        """
+        from byro.common.jobs import get_job_function
+        try:
+            self.result = get_job_function(self.name)(self, **self.arguments)
+        except Exception:
+            self.error = traceback.format_exc()
+            if self.attempts < self.max_attempts:
+                self.state = JobState.QUEUED
+                self.run_after = now() + self.retry_delay * 2 ** (self.attempts - 1)
+            else:
+                self.state = JobState.FAILED
+                self.finished = now()
+        else:
+            self.state = JobState.DONE
+            self.error = None
+            self.finished = now()
+        self.save()
+
+    def retry(self):
+        self.state = JobState.QUEUED
+        self.run_after = now()
+        self.attempts = 0
+        self.progress = 0
+        self.finished = None
+        self.save()
@@ -0,0 +1,106 @@
+import re
+
+from django.apps import apps
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramSimilarity,
+)
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'pg_catalog.simple'
+WORD_RE = re.compile(r'\w+')
+# Words as in the search text, e.g. email addresses, without tsquery syntax
+TOKEN_RE = re.compile(r"[^\s'\\:&|!()<>*]+")
+_trigram_available = None
+
+
+class PrefixSearchQuery(SearchQuery):
+    """
+    Matches documents containing words that start with each of the words
+    in the search text, so that partial input finds results while typing.
+    """
+
+    def as_sql(self, compiler, connection):
+        words = [token for token in TOKEN_RE.findall(self.value.lower()) if WORD_RE.search(token)]
+        value = ' & '.join("'{}':*".format(word) for word in words)
+        return "to_tsquery('{}'::regconfig, %s)".format(SEARCH_CONFIG), [value]
+
+
+def trigram_available() -> bool:
+    """
+    Whether the pg_trgm extension is installed. Where it is, substring
+    matches on names are indexed and results are ranked by similarity, but
+    it is not required.
+    """
+    global _trigram_available
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
+
+
+def create_trigram_index(schema_editor, table: str, column: str):
+    """
+    Migration helper: creates a trigram index for case-insensitive
+    substring and similarity lookups on ``table.column``, if the pg_trgm
+    extension is installed or the database user may install it.
+    """
+    cursor = schema_editor.connection.cursor()
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    if cursor.fetchone() is None:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                schema_editor.execute('CREATE EXTENSION pg_trgm')
+        except DatabaseError:
+            # Before PostgreSQL 13, only superusers may install pg_trgm
+            return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING gin (UPPER({column}) gin_trgm_ops)'.format(
+            table=table, column=column,
+        )
+    )
+
+
+def _search(queryset, text: str, condition: Q, rank: bool, similarity=None):
+    query = PrefixSearchQuery(text)
+    queryset = queryset.filter(Q(search_vector=query) | condition)
+    if rank:
+        score = SearchRank(F('search_vector'), query)
+        if similarity:
+            score = score + TrigramSimilarity(similarity, text)
+        queryset = queryset.annotate(search_rank=score).order_by('-search_rank', '-pk')
+    return queryset
+
+
+def search_members(queryset, text: str, rank: bool = False):
+    """
+    Filters a Member queryset by membership number, name, email address or
+    nick. With ``rank``, the best matches come first.
+    """
+    text = text.strip()
+    if not WORD_RE.search(text):
+        return queryset.none()
+    condition = Q(number=text)
+    if apps.is_installed('byro.plugins.profile'):
+        # A subquery instead of a join, so that the OR does not prevent
+        # the use of the member indexes
+        MemberProfile = apps.get_model('profile', 'MemberProfile')
+        condition |= Q(pk__in=MemberProfile.objects.filter(nick__icontains=text).values('member'))
+    if trigram_available():
+        condition |= Q(name__icontains=text)
+        return _search(queryset, text, condition, rank, similarity='name')
+    return _search(queryset, text, condition, rank)
+
+
+def search_transactions(queryset, text: str, rank: bool = False):
+    """
+    Filters a RealTransaction queryset by purpose and originator. With
+    ``rank``, the best matches come first.
+    """
+    if not WORD_RE.search(text):
+        return queryset.none()
+    return _search(queryset, text, Q(), rank)
@@ -1,9 +1,10 @@
 from django.conf.urls import url
 
-from .views import LoginView, logout_view
+from .views import LoginView, health_view, logout_view
 
 app_name = 'common'
 urlpatterns = [
     url('^login/$', LoginView.as_view(), name='login'),
     url('^logout/$', logout_view, name='logout'),
+    url('^health$', health_view, name='health'),
 ]
@@ -0,0 +1,24 @@
+import subprocess
+from contextlib import suppress
+from functools import lru_cache
+
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_version_info() -> dict:
+    """
+    Returns the installed byro version and, for git checkouts, the current
+    commit. Both are resolved once per process.
+    """
+    info = {'version': None, 'commit': None}
+    with suppress(Exception):
+        from pkg_resources import get_distribution
+        info['version'] = get_distribution('byro').version
+    with suppress(Exception):
+        info['commit'] = subprocess.check_output(
+            ['git', 'describe', '--always'],
+            cwd=settings.BASE_DIR,
+            stderr=subprocess.DEVNULL,
+        ).decode().strip() or None
+    return info
@@ -2,12 +2,15 @@ import urllib
 
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
-from django.http import HttpRequest, HttpResponseRedirect
+from django.db import connection
+from django.http import HttpRequest, HttpResponseRedirect, JsonResponse
 from django.shortcuts import redirect
 from django.utils.http import is_safe_url
 from django.utils.translation import ugettext as _
 from django.views.generic import TemplateView
 
+from byro.common.version import get_version_info
+
 
 class LoginView(TemplateView):
     template_name = 'common/auth/login.html'
@@ -36,3 +39,14 @@ class LoginView(TemplateView):
 def logout_view(request: HttpRequest) -> HttpResponseRedirect:
     logout(request)
     return redirect('/')
+
+
+def health_view(request: HttpRequest) -> JsonResponse:
+    data = dict(get_version_info())
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        data['status'] = 'ok'
+    except Exception:
+        data['status'] = 'error'
+    return JsonResponse(data, status=200 if data['status'] == 'ok' else 503)
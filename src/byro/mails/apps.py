@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MailsConfig(AppConfig):
     name = 'byro.mails'
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,71 @@
+import mimetypes
+import os
+from collections import OrderedDict, defaultdict
+from threading import Lock
+
+from django.conf import settings
+
+
+class AttachmentCache:
+    """
+    Keeps the contents of recently attached documents in memory, so that a
+    document sent to many members is read from disk only once. Entries are
+    keyed by document and modification time, and the least recently used
+    ones are evicted once their total size exceeds ``max_size`` bytes.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, document):
+        """
+        Returns the file name, content and MIME type of a Document.
+        """
+        path = document.document.path
+        key = (document.pk, os.path.getmtime(path))
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        with open(path, 'rb') as f:
+            content = f.read()
+        filename = os.path.basename(path)
+        payload = (filename, content, mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        if len(content) <= self.max_size:
+            with self.lock:
+                if key not in self.entries:
+                    self.entries[key] = payload
+                    self.size += len(content)
+                while self.size > self.max_size:
+                    evicted_key, evicted = self.entries.popitem(last=False)
+                    self.size -= len(evicted[1])
+        return payload
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+attachment_cache = AttachmentCache(settings.MAIL_ATTACHMENT_CACHE_SIZE)
+
+
+def get_attachments(mails) -> dict:
+    """
+    Returns a dict mapping the primary key of each of the given EMails to
+    the list of its attached Documents, using two queries in total.
+    """
+    from byro.documents.models import Document
+    from byro.mails.models import EMail
+
+    links = list(EMail.attachments.through.objects.filter(
+        email_id__in=[mail.pk for mail in mails],
+    ).order_by('pk').values_list('email_id', 'document_id'))
+    documents = Document.objects.in_bulk({document_id for email_id, document_id in links})
+    result = defaultdict(list)
+    for email_id, document_id in links:
+        result[email_id].append(documents[document_id])
+    return result
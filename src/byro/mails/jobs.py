@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db.models import Min
+
+from byro.common.jobs import register_job
+from byro.common.models import Job
+from byro.mails.models import EMail
+from byro.mails.outbox import OutboxDispatcher
+
+
+@register_job('mails.send')
+def send_mails(job, mails):
+    queryset = EMail.objects.filter(pk__in=mails).due().order_by('pk')
+    job.set_progress(0, total=queryset.count())
+    report = OutboxDispatcher().send(queryset.iterator(), progress=job.set_progress)
+    errors = {str(pk): error for pk, error in report.items() if error}
+
+    retry = EMail.objects.filter(pk__in=mails, sent__isnull=True, attempts__lt=settings.MAIL_MAX_ATTEMPTS)
+    next_attempt = retry.aggregate(next_attempt=Min('next_attempt'))['next_attempt']
+    if next_attempt:
+        follow_up = Job.enqueue('mails.send', mails=list(retry.values_list('pk', flat=True)))
+        follow_up.run_after = next_attempt
+        follow_up.save(update_fields=['run_after'])
+    return {'sent': len(report) - len(errors), 'errors': len(errors), 'report': errors}
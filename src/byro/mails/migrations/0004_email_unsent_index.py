@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0003_mailtemplate_reply_to'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX mails_email_unsent ON mails_email (id) WHERE sent IS NULL;',
+            'DROP INDEX mails_email_unsent;',
+        ),
+    ]
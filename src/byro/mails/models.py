@@ -1,15 +1,23 @@
 from copy import deepcopy
+from itertools import chain, islice
 
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMultiAlternatives
+from django.db import models, transaction
+from django.db.models import Q
 from django.utils.timezone import now
 from django.utils.translation import override, ugettext_lazy as _
 from i18nfield.fields import I18nCharField, I18nTextField
 
 from byro.common.models.auditable import Auditable
+from byro.mails.rendering import compile_template, get_compiled_template
 from byro.mails.send import SendMailException
 
 
 class MailTemplate(Auditable, models.Model):
+    # The context keys provided by the membership and mass mail views
+    CONTEXT_KEYS = ('name', 'contact', 'number', 'member_name', 'end', 'additional_information')
 
     subject = I18nCharField(
         max_length=200,
@@ -34,17 +42,28 @@ class MailTemplate(Auditable, models.Model):
     def __str__(self):
         return '{self.subject}'.format(self=self)
 
+    def clean(self):
+        errors = {}
+        for field in ('subject', 'text'):
+            value = getattr(self, field)
+            data = getattr(value, 'data', value)
+            for text in (data.values() if isinstance(data, dict) else [data]):
+                try:
+                    compile_template(str(text or '')).validate(self.CONTEXT_KEYS)
+                except SendMailException as e:
+                    errors[field] = str(e)
+        if errors:
+            raise ValidationError(errors)
+
     def to_mail(self, email, locale=None, context=None, skip_queue=False, attachments=None):
-        from byro.common.models import Configuration
-        config = Configuration.get_solo()
-        locale = locale or config.language
+        if not locale:
+            from byro.common.models import Configuration
+            locale = Configuration.get_solo().language
+        subject_template, text_template = get_compiled_template(self, locale)
         with override(locale):
             context = context or dict()
-            try:
-                subject = str(self.subject).format(**context)
-                text = str(self.text).format(**context)
-            except KeyError as e:
-                raise SendMailException('Experienced KeyError when rendering Text: {e}'.format(e=e))
+            subject = subject_template.render(context)
+            text = text_template.render(context)
 
             mail = EMail(
                 to=email,
@@ -61,6 +80,81 @@ class MailTemplate(Auditable, models.Model):
                 mail.send()
         return mail
 
+    @transaction.atomic
+    def to_mails(self, members, context_builder=None, locale=None, attachments=None, batch_size=500) -> int:
+        """
+        Creates one EMail for each member in the ``members`` queryset that
+        has an email address, rendered in ``locale``, inserting ``batch_size``
+        mails and their attachment links at a time. ``context_builder`` is called with each
+        member and returns the context to render the template with; the
+        default provides the association's name and contact address and the
+        member's number and name. Subject and text are compiled for the
+        locale once instead of per member, and checked against the context
+        of the first member before any mail is created.
+
+        Returns the number of created mails.
+        """
+        from byro.common.models import Configuration
+        config = Configuration.get_solo()
+        if context_builder is None:
+            def context_builder(member):
+                return {
+                    'name': config.name,
+                    'contact': config.mail_from,
+                    'number': member.number,
+                    'member_name': member.name,
+                }
+        locale = locale or config.language
+        subject_template, text_template = get_compiled_template(self, locale)
+        attachments = list(attachments or [])
+
+        created = 0
+        members = members.with_email().iterator()
+        first = next(members, None)
+        if first is None:
+            return created
+        with override(locale):
+            context = context_builder(first)
+            try:
+                subject_template.validate(context)
+                text_template.validate(context)
+            except SendMailException:
+                members.close()  # releases the server-side cursor before the rollback
+                raise
+            members = chain([first], members)
+            while True:
+                batch = list(islice(members, batch_size))
+                if not batch:
+                    break
+                mails = []
+                for member in batch:
+                    context = context_builder(member)
+                    mails.append(EMail(
+                        to=member.email, reply_to=self.reply_to, bcc=self.bcc,
+                        subject=subject_template.render(context), text=text_template.render(context),
+                    ))
+                EMail.objects.bulk_create(mails)
+                EMail.attachments.through.objects.bulk_create([
+                    EMail.attachments.through(email_id=mail.pk, document_id=document.pk)
+                    for mail in mails for document in attachments
+                ])
+                created += len(mails)
+        return created
+
+
+class EMailQuerySet(models.QuerySet):
+
+    def due(self):
+        """
+        Unsent mails that have not failed too often and whose retry delay
+        has passed.
+        """
+        return self.filter(
+            Q(next_attempt__isnull=True) | Q(next_attempt__lte=now()),
+            sent__isnull=True,
+            attempts__lt=settings.MAIL_MAX_ATTEMPTS,
+        )
+
 
 class EMail(Auditable, models.Model):
     to = models.CharField(
@@ -95,6 +189,12 @@ class EMail(Auditable, models.Model):
         to='documents.Document',
         related_name='mails',
     )
+    # Failed delivery attempts, see byro.mails.outbox
+    attempts = models.IntegerField(default=0)
+    next_attempt = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    objects = EMailQuerySet.as_manager()
 
     @property
     def attachment_ids(self):
@@ -102,6 +202,24 @@ class EMail(Auditable, models.Model):
             return list(self.attachments.all().values_list('pk', flat=True))
         return []
 
+    def to_message(self, attachments=None) -> EmailMultiAlternatives:
+        """
+        Builds the message to send. ``attachments`` are the attached
+        Documents, if they have been looked up already.
+        """
+        from byro.mails.attachments import attachment_cache
+        message = EmailMultiAlternatives(
+            self.subject, self.text, self.reply_to,
+            to=self.to.split(','),
+            cc=(self.cc or '').split(','),
+            bcc=(self.bcc or '').split(','),
+        )
+        if attachments is None:
+            attachments = self.attachments.all()
+        for document in attachments:
+            message.attach(*attachment_cache.get(document))
+        return message
+
     def send(self):
         if self.sent:
             raise Exception('This mail has been sent already. It cannot be sent again.')
@@ -0,0 +1,120 @@
+import logging
+import time
+from datetime import timedelta
+from itertools import islice
+from smtplib import SMTPServerDisconnected
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils.timezone import now
+
+from byro.mails.attachments import get_attachments
+from byro.mails.models import EMail
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """
+    Sends many EMails over few connections: each batch of ``batch_size``
+    mails shares one SMTP session. Each mail is locked while it is sent and
+    marked as sent right afterwards, so that neither a concurrent nor a
+    restarted job sends it again.
+
+    A mail that cannot be sent does not stop the others. Its ``attempts``
+    are counted and it is held back for ``MAIL_RETRY_DELAY`` seconds,
+    doubling with each failure, until ``MAIL_MAX_ATTEMPTS`` is reached. With
+    ``rate_limit``, at most that many mails are sent per minute.
+    """
+
+    def __init__(self, batch_size=None, rate_limit=None, get_connection=get_connection):
+        self.batch_size = batch_size or settings.MAIL_BATCH_SIZE
+        self.rate_limit = rate_limit or settings.MAIL_RATE_LIMIT
+        self.get_connection = get_connection
+        self.last_sent = None
+
+    def throttle(self):
+        if not self.rate_limit:
+            return
+        if self.last_sent is not None:
+            delay = self.last_sent + 60 / self.rate_limit - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.last_sent = time.monotonic()
+
+    def send(self, mails, progress=None) -> dict:
+        """
+        Sends the given EMails, skipping those that have been sent already.
+        Returns a dict mapping the primary key of each mail to ``None`` if it
+        was sent, or to an error message. ``progress`` is called with the
+        number of handled mails after each batch.
+        """
+        report = {}
+        mails = iter(mails)
+        while True:
+            batch = [mail for mail in islice(mails, self.batch_size) if not mail.sent]
+            if not batch:
+                break
+            report.update(self.send_batch(batch))
+            if progress:
+                progress(len(report))
+        return report
+
+    def send_batch(self, batch) -> dict:
+        report = {}
+        attachments = get_attachments(batch)
+        connection = self.get_connection(fail_silently=False)
+        is_open = False
+        try:
+            for mail in batch:
+                with transaction.atomic():
+                    if not self.lock(mail):
+                        continue
+                    try:
+                        message = mail.to_message(attachments=attachments.get(mail.pk, []))
+                        if not is_open:
+                            connection.open()
+                            is_open = True
+                        self.throttle()
+                        if not connection.send_messages([message]):
+                            raise ValueError('The mail has no recipients.')
+                    except (SMTPServerDisconnected, ConnectionError) as e:
+                        connection.close()
+                        is_open = False
+                        report[mail.pk] = str(e) or repr(e)
+                    except Exception as e:
+                        logger.exception('Error sending email %s', mail.pk)
+                        report[mail.pk] = str(e) or repr(e)
+                    else:
+                        report[mail.pk] = None
+                    if report[mail.pk] is None:
+                        self.record_success(mail)
+                    else:
+                        self.record_failure(mail, report[mail.pk])
+        finally:
+            if is_open:
+                connection.close()
+        return report
+
+    def lock(self, mail) -> bool:
+        """
+        Locks the row of an unsent mail until the end of the transaction.
+        Returns False if the mail has been sent in the meantime or is being
+        sent by another job.
+        """
+        locked = EMail.objects.select_for_update(skip_locked=True).filter(pk=mail.pk, sent__isnull=True)
+        return locked.values_list('pk', flat=True).first() is not None
+
+    def record_success(self, mail):
+        mail.sent = now()
+        EMail.objects.filter(pk=mail.pk).update(sent=mail.sent, next_attempt=None, error=None)
+
+    def record_failure(self, mail, error: str):
+        delay = timedelta(seconds=settings.MAIL_RETRY_DELAY) * 2 ** mail.attempts
+        mail.attempts += 1
+        mail.next_attempt = now() + delay
+        mail.error = error
+        EMail.objects.filter(pk=mail.pk).update(
+            attempts=mail.attempts, next_attempt=mail.next_attempt, error=mail.error,
+        )
@@ -0,0 +1,85 @@
+import re
+import string
+from functools import lru_cache
+
+from django.utils.translation import override
+
+from byro.mails.send import SendMailException
+
+FIELD_KEY_RE = re.compile(r'[.\[]')
+_formatter = string.Formatter()
+_compiled_templates = {}
+
+
+class CompiledTemplate:
+    """
+    A template string in ``str.format`` syntax, parsed once. ``fields`` are
+    the context keys it uses, so that a context can be checked before
+    rendering many mails.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        try:
+            self.parts = [
+                (literal, field_name, CompiledTemplate(format_spec) if '{' in (format_spec or '') else format_spec, conversion)
+                for literal, field_name, format_spec, conversion in _formatter.parse(text)
+            ]
+        except ValueError as e:
+            raise SendMailException('Invalid template: {e}'.format(e=e))
+        fields = set()
+        for literal, field_name, format_spec, conversion in self.parts:
+            if field_name is not None:
+                fields.add(FIELD_KEY_RE.split(field_name, 1)[0])
+            if isinstance(format_spec, CompiledTemplate):
+                fields |= format_spec.fields
+        self.fields = frozenset(fields)
+
+    def validate(self, keys):
+        missing = self.fields - set(keys)
+        if missing:
+            raise SendMailException('Unknown placeholders in template: {}'.format(', '.join(sorted(missing))))
+
+    def render(self, context) -> str:
+        result = []
+        try:
+            for literal, field_name, format_spec, conversion in self.parts:
+                result.append(literal)
+                if field_name is None:
+                    continue
+                value = _formatter.convert_field(_formatter.get_field(field_name, (), context)[0], conversion)
+                if isinstance(format_spec, CompiledTemplate):
+                    format_spec = format_spec.render(context)
+                result.append(format(value, format_spec or ''))
+        except (AttributeError, IndexError, KeyError, ValueError) as e:
+            if isinstance(e, KeyError):
+                self.validate(context)
+            raise SendMailException('Experienced {type} when rendering Text: {e}'.format(type=type(e).__name__, e=e))
+        return ''.join(result)
+
+
+@lru_cache(maxsize=256)
+def compile_template(text: str) -> CompiledTemplate:
+    return CompiledTemplate(text)
+
+
+def get_compiled_template(template, locale: str):
+    """
+    Returns the compiled subject and text of a MailTemplate in ``locale``.
+    They are cached per template and locale, and compiled again if the
+    template has been changed, also by another process.
+    """
+    source = repr([getattr(value, 'data', value) for value in (template.subject, template.text)])
+    cached = _compiled_templates.get((template.pk, locale))
+    if cached and cached[0] == source:
+        return cached[1]
+    with override(locale):
+        compiled = (compile_template(str(template.subject)), compile_template(str(template.text)))
+    if template.pk:
+        _compiled_templates[(template.pk, locale)] = (source, compiled)
+    return compiled
+
+
+def invalidate_compiled_template(pk):
+    for key in [key for key in _compiled_templates if key[0] == pk]:
+        _compiled_templates.pop(key, None)
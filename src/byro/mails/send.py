@@ -50,11 +50,10 @@ def mail(email: str, subject: str, template: Union[str, LazyI18nString],
     locale = locale or c.language
 
     with override(locale):
-        body = str(template)
-        if context:
-            body = body.format_map(TolerantDict(context))
+        from byro.mails.rendering import compile_template
+        body = compile_template(str(template)).render(TolerantDict(context or {}))
 
-        sender = Configuration.get_solo().mail_from
+        sender = c.mail_from
         subject = str(subject)
         body_plain = body
         return mail_send_task.apply_async(args=([email], subject, body_plain, sender, headers))
@@ -70,8 +69,10 @@ def mail_send_task(
     )
     if attachments:
         from byro.documents.models import Document
+        from byro.mails.attachments import attachment_cache
+        documents = Document.objects.in_bulk(attachments)
         for attachment in attachments:
-            email.attach_file(Document.objects.get(pk=attachment).document.path)
+            email.attach(*attachment_cache.get(documents[attachment]))
     backend = get_connection(fail_silently=False)
 
     try:
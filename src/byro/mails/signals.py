@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from byro.mails.models import MailTemplate
+from byro.mails.rendering import invalidate_compiled_template
+
+
+@receiver(post_save, sender=MailTemplate)
+@receiver(post_delete, sender=MailTemplate)
+def invalidate_mail_template(sender, instance, **kwargs):
+    invalidate_compiled_template(instance.pk)
@@ -0,0 +1,9 @@
+from byro.common.jobs import register_job
+from byro.members.liabilities import update_liabilities
+from byro.members.models import Member
+
+
+@register_job('members.update_liabilities')
+def update_liabilities_job(job):
+    created, updated, deleted = update_liabilities(members=Member.objects.all())
+    return {'created': created, 'updated': updated, 'deleted': deleted}
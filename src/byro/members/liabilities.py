@@ -0,0 +1,118 @@
+from collections import defaultdict
+from datetime import datetime, time
+from typing import Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils.timezone import make_aware, now
+
+from byro.common.models import Configuration
+from byro.members.models import Membership
+
+
+def _chunks(items, size):
+    items = list(items)
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def get_liability_schedule(memberships, cutoff, today) -> dict:
+    """
+    Returns a dict mapping ``(member_id, date)`` to the fee amount due on
+    that date, for all fee periods between ``cutoff`` and the end of each
+    membership (or ``today`` for running memberships).
+    """
+    schedule = {}
+    rows = memberships.order_by('pk').values_list('member_id', 'start', 'end', 'amount', 'interval')
+    for member_id, start, end, amount, interval in rows.iterator():
+        date = start
+        end = end or today
+        while date <= end:
+            if date >= cutoff:
+                schedule[(member_id, date)] = amount
+            date += relativedelta(months=interval)
+    return schedule
+
+
+@transaction.atomic
+def update_liabilities(members=None, chunk_size=1000) -> Tuple[int, int, int]:
+    """
+    Creates, corrects or removes the fee liabilities of the given members
+    (or all members) within the configured liability interval, so that
+    they match the fee schedule of their memberships. Fee dates within
+    closed fiscal periods are left alone, and so are transactions on the
+    fee account that were booked by hand.
+
+    The expected schedule is computed in memory and compared with the
+    existing liabilities, which are loaded in a single query. Returns the
+    number of created, updated and deleted liabilities.
+    """
+    from byro.bookkeeping.models import (
+        Account, AccountCategory, FiscalPeriod, MemberBalance, VirtualTransaction,
+    )
+
+    config = Configuration.get_solo()
+    booking_date = now()
+    cutoff = (booking_date - relativedelta(months=config.liability_interval)).date()
+    closed_until = FiscalPeriod.objects.closed_until()
+    account = Account.objects.filter(account_category=AccountCategory.MEMBER_FEES).first()
+
+    memberships = Membership.objects.all()
+    existing = VirtualTransaction.objects.filter(
+        source_account=account,
+        member__isnull=False,
+        real_transaction__isnull=True,
+        value_datetime__gte=make_aware(datetime.combine(cutoff, time.min)),
+    )
+    if members is not None:
+        memberships = memberships.filter(member__in=members)
+        existing = existing.filter(member__in=members)
+
+    schedule = {
+        (member_id, make_aware(datetime.combine(date, time.min))): amount
+        for (member_id, date), amount in get_liability_schedule(memberships, cutoff, booking_date.date()).items()
+    }
+    if closed_until:
+        schedule = {key: amount for key, amount in schedule.items() if key[1] > closed_until}
+    current = {}
+    if closed_until:
+        existing = existing.filter(value_datetime__gt=closed_until)
+    to_delete = []
+    changed_members = set()
+    rows = existing.order_by('-is_liability', 'pk').values_list('pk', 'member_id', 'value_datetime', 'amount', 'is_liability')
+    for pk, member_id, value_datetime, amount, is_liability in rows:
+        if (member_id, value_datetime) in schedule and (member_id, value_datetime) not in current:
+            current[(member_id, value_datetime)] = (pk, amount)
+        elif is_liability:
+            to_delete.append(pk)
+            changed_members.add(member_id)
+
+    to_create = []
+    to_update = defaultdict(list)
+    for (member_id, value_datetime), amount in schedule.items():
+        if (member_id, value_datetime) not in current:
+            to_create.append(VirtualTransaction(
+                source_account=account,
+                value_datetime=value_datetime,
+                amount=amount,
+                member_id=member_id,
+                is_liability=True,
+            ))
+            changed_members.add(member_id)
+            continue
+        pk, current_amount = current[(member_id, value_datetime)]
+        if current_amount != amount:
+            to_update[amount].append(pk)
+            changed_members.add(member_id)
+
+    # Without the per-row delete signals: the rows lie in open periods and
+    # have no real transaction, and the balances are refreshed below
+    for chunk in _chunks(to_delete, chunk_size):
+        VirtualTransaction.objects.filter(pk__in=chunk)._raw_delete(VirtualTransaction.objects.db)
+    VirtualTransaction.objects.bulk_create(to_create, batch_size=chunk_size)
+    for amount, pks in to_update.items():
+        for chunk in _chunks(pks, chunk_size):
+            VirtualTransaction.objects.filter(pk__in=chunk).update(amount=amount)
+
+    MemberBalance.objects.refresh_members(changed_members)
+    return len(to_create), sum(len(pks) for pks in to_update.values()), len(to_delete)
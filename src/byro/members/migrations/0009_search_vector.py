@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:13
+from __future__ import unicode_literals
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    from byro.common.search import create_trigram_index
+    create_trigram_index(schema_editor, 'members_member', 'name')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0008_membership_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='members_mem_search__ecc0ed_gin'),
+        ),
+        migrations.RunSQL(
+            'CREATE TRIGGER members_member_search_vector BEFORE INSERT OR UPDATE OF number, name, email ON members_member '
+            "FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger(search_vector, 'pg_catalog.simple', number, name, email);",
+            'DROP TRIGGER members_member_search_vector ON members_member;',
+        ),
+        migrations.RunSQL(
+            "UPDATE members_member SET search_vector = to_tsvector('pg_catalog.simple', coalesce(number, '') || ' ' || coalesce(name, '') || ' ' || coalesce(email, ''));",
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(create_trigram_indexes, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from decimal import Decimal
 
 from dateutil.relativedelta import relativedelta
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models.fields.related import OneToOneRel
 from django.utils.decorators import classproperty
@@ -16,13 +18,52 @@ class MemberTypes:
     EXTERNAL = 'external'
 
 
-class MemberManager(models.Manager):
+class MemberQuerySet(models.QuerySet):
+
+    def with_email(self):
+        """
+        Members that can be sent mails to.
+        """
+        return self.exclude(email__isnull=True).exclude(email='')
+
+    def with_balance(self, cutoff=None, end=None):
+        """
+        Annotates ``fee_asset``, ``fee_liability`` and ``fee_balance`` (the
+        same value as ``Member.balance``) in a single query. By default,
+        transactions within the configured liability interval are counted.
+        """
+        end = end or now()
+        if cutoff is None:
+            config = Configuration.get_solo()
+            cutoff = end - relativedelta(months=config.liability_interval)
+
+        def fee_sum(side):
+            return models.Sum(models.Case(
+                models.When(
+                    transactions__value_datetime__gte=cutoff,
+                    transactions__value_datetime__lte=end,
+                    then='transactions__amount',
+                    **{'transactions__{side}__account_category'.format(side=side): 'member_fees'}
+                ),
+                default=Decimal('0.00'),
+                output_field=models.DecimalField(),
+            ))
+
+        return self.annotate(
+            fee_asset=fee_sum('destination_account'),
+            fee_liability=fee_sum('source_account'),
+        ).annotate(
+            fee_balance=models.F('fee_asset') - models.F('fee_liability'),
+        )
+
+
+class MemberManager(models.Manager.from_queryset(MemberQuerySet)):
 
     def get_queryset(self):
         return super().get_queryset().filter(membership_type=MemberTypes.MEMBER)
 
 
-class AllMemberManager(models.Manager):
+class AllMemberManager(models.Manager.from_queryset(MemberQuerySet)):
     pass
 
 
@@ -53,11 +94,18 @@ class Member(Auditable, models.Model):
         max_length=40,
         default=MemberTypes.MEMBER,
     )
+    # Maintained by a database trigger from number, name and email
+    search_vector = SearchVectorField(null=True, editable=False)
 
     form_title = _('Member')
     objects = MemberManager()
     all_objects = AllMemberManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector']),
+        ]
+
     @classproperty
     def profile_classes(cls) -> list:
         return [
@@ -75,12 +123,12 @@ class Member(Auditable, models.Model):
 
     @property
     def balance(self) -> Decimal:
+        from byro.bookkeeping.models import MemberBalance
+
         config = Configuration.get_solo()
-        cutoff = now() - relativedelta(months=config.liability_interval)
-        qs = self.transactions.filter(value_datetime__lte=now(), value_datetime__gte=cutoff)
-        liability = qs.filter(source_account__account_category='member_fees').aggregate(liability=models.Sum('amount'))['liability'] or Decimal('0.00')
-        asset = qs.filter(destination_account__account_category='member_fees').aggregate(asset=models.Sum('amount'))['asset'] or Decimal('0.00')
-        return asset - liability
+        end = now()
+        cutoff = end - relativedelta(months=config.liability_interval)
+        return MemberBalance.objects.balance(self, start=cutoff, end=end)
 
     @property
     def donations(self):
@@ -95,37 +143,8 @@ class Member(Auditable, models.Model):
         )
 
     def update_liabilites(self):
-        from byro.bookkeeping.models import Account, VirtualTransaction
-
-        config = Configuration.get_solo()
-        booking_date = now()
-        cutoff = (booking_date - relativedelta(months=config.liability_interval)).date()
-        account = Account.objects.filter(account_category='member_fees').first()
-
-        for membership in self.memberships.all():
-            date = membership.start
-            if date < cutoff:
-                date = cutoff
-            end = membership.end or booking_date.date()
-            while date <= end:
-                vt = VirtualTransaction.objects.filter(
-                    source_account=account,
-                    value_datetime=date,
-                    member=self,
-                ).first()
-
-                if vt:
-                    if vt.amount != membership.amount:
-                        vt.amount = membership.amount
-                        vt.save()
-                else:
-                    VirtualTransaction.objects.create(
-                        source_account=account,
-                        value_datetime=date,
-                        amount=membership.amount,
-                        member=self,
-                    )
-                date += relativedelta(months=membership.interval)
+        from byro.members.liabilities import update_liabilities
+        update_liabilities(members=[self])
 
     def remove_future_liabilites_on_leave(self):
         for vt in self.transactions.all():
@@ -191,5 +210,7 @@ class Membership(Auditable, models.Model):
         verbose_name=_('payment interval'),
         help_text=_('How often does the member pay their fees?'),
     )
+    # Auditable is no abstract model, so its fields need to be declared here
+    modified = models.DateTimeField(auto_now=True, null=True)
 
     form_title = _('Membership')
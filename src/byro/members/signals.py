@@ -1,4 +1,12 @@
+from threading import local
+
 import django.dispatch
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from byro.members.liabilities import update_liabilities
+from byro.members.models import Member, Membership
 
 new_member_mail_information = django.dispatch.Signal()
 """
@@ -25,3 +33,39 @@ leave_member_office_mail_information = django.dispatch.Signal()
 Receives the leave of a member as signal. Response will be added to the email
 notifying the office about the termination of the member.
 """
+
+
+_pending_liability_updates = local()
+
+
+def get_pending_liability_updates() -> set:
+    """
+    Returns the ids of the members whose liabilities are to be updated after
+    the current transaction of this thread's database connection.
+    """
+    if not hasattr(_pending_liability_updates, 'members'):
+        _pending_liability_updates.members = set()
+    return _pending_liability_updates.members
+
+
+def update_pending_liabilities():
+    pending = get_pending_liability_updates()
+    if not pending:
+        return
+    members = set(pending)
+    pending.clear()
+    update_liabilities(members=Member.all_objects.filter(pk__in=members))
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def update_liabilities_on_membership_change(sender, instance, **kwargs):
+    """
+    Recomputes the liabilities of the membership's member once the current
+    transaction has been committed. The first callback to run updates all
+    pending members at once, so several changes within one transaction
+    result in a single update. Members changed in a rolled back transaction
+    stay pending and are updated after the next commit, which is harmless.
+    """
+    get_pending_liability_updates().add(instance.member_id)
+    transaction.on_commit(update_pending_liabilities)
@@ -1,6 +1,9 @@
 from typing import Tuple
 
 from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
 
 from byro.members.models import Membership
 
@@ -11,22 +14,48 @@ def get_member_statistics_for_month(month, year) -> Tuple[int, int]:
     return joins, quits
 
 
-def get_member_statistics():
-    """
-    Returns a list of tuples of the form ((year, month), joins, quits).
-    """
-    first_member = Membership.objects.order_by('start').first()
-    if not first_member:
-        return []
+def _count_by_month(field) -> dict:
+    rows = Membership.objects.filter(**{field + '__isnull': False}).annotate(
+        month=TruncMonth(field),
+    ).values_list('month').annotate(count=Count('pk')).order_by()
+    return dict(rows)
 
-    date = first_member.start
-    end_member = Membership.objects.filter(end__isnull=False).order_by('-end').first()
-    if not end_member:
+
+def _compute_member_statistics() -> list:
+    joins = _count_by_month('start')
+    quits = _count_by_month('end')
+    if not joins or not quits:
         return []
-    end = end_member.end
-    result = []
 
+    date = min(joins)
+    end = max(quits)
+    result = []
+    active = 0
     while date <= end:
-        result.append(((date.year, date.month), *get_member_statistics_for_month(date.month, date.year)))
+        active += joins.get(date, 0)
+        result.append(((date.year, date.month), joins.get(date, 0), quits.get(date, 0), active))
+        active -= quits.get(date, 0)
         date += relativedelta(months=1)
     return result
+
+
+def get_member_statistics(include_active=False):
+    """
+    Returns a list of tuples of the form ((year, month), joins, quits).
+    With ``include_active``, the number of memberships active during the
+    month is added as fourth element.
+
+    The result is cached until a membership is added, changed or removed.
+    """
+    state = Membership.objects.aggregate(count=Count('pk'), latest=Max('modified'))
+    key = 'member_statistics:{count}:{latest}'.format(
+        count=state['count'],
+        latest=state['latest'].timestamp() if state['latest'] else '',
+    )
+    result = cache.get(key)
+    if result is None:
+        result = _compute_member_statistics()
+        cache.set(key, result)
+    if include_active:
+        return result
+    return [(month, joins, quits) for month, joins, quits, active in result]
@@ -1,4 +1,9 @@
 import django.dispatch
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from byro.bookkeeping.models import RealTransaction, VirtualTransaction
+from byro.members.models import Member, Membership
 
 member_view = django.dispatch.Signal()
 """
@@ -22,3 +27,16 @@ least the keys ``label`` and ``url``. You can also return a ForkAwesome
 icon name iwth the key ``icon``. You should also return an ``active``
 key with a boolean set to ``True`` if this item should be marked as active.
 """
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+@receiver(post_save, sender=RealTransaction)
+@receiver(post_delete, sender=RealTransaction)
+@receiver(post_save, sender=VirtualTransaction)
+@receiver(post_delete, sender=VirtualTransaction)
+def invalidate_dashboard(sender, **kwargs):
+    from byro.office.views.dashboard import invalidate_dashboard_metrics
+    invalidate_dashboard_metrics()
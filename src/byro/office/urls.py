@@ -1,7 +1,8 @@
 from django.conf.urls import include, url
 
 from .views import (
-    accounts, dashboard, mails, members, realtransactions, settings, upload,
+    accounts, dashboard, jobs, mails, members,
+    realtransactions, settings, upload,
 )
 
 app_name = 'office'
@@ -21,6 +22,7 @@ urlpatterns = [
     ])),
 
     url('^realtransaction/list', realtransactions.RealTransactionListView.as_view(), name='realtransactions.list'),
+    url('^realtransaction/queue', realtransactions.RealTransactionQueueView.as_view(), name='realtransactions.queue'),
     url('^realtransaction/match', realtransactions.RealTransactionMatchView.as_view(), name='realtransactions.match'),
 
     url('^upload/list', upload.UploadListView.as_view(), name='uploads.list'),
@@ -42,8 +44,13 @@ urlpatterns = [
     url('^mails/outbox/send$', mails.OutboxSend.as_view(), name='mails.outbox.send'),
     url('^mails/outbox/purge$', mails.OutboxPurge.as_view(), name='mails.outbox.purge'),
 
+    url('^jobs/$', jobs.JobListView.as_view(), name='jobs.list'),
+    url(r'^jobs/(?P<pk>\d+)/$', jobs.JobDetailView.as_view(), name='jobs.detail'),
+    url(r'^jobs/(?P<pk>\d+)/retry$', jobs.JobRetryView.as_view(), name='jobs.retry'),
+
     url('^mails/templates$', mails.TemplateList.as_view(), name='mails.templates.list'),
     url('^mails/templates/new$', mails.TemplateDetail.as_view(), name='mails.templates.create'),
     url('^mails/templates/(?P<pk>[0-9]+)$', mails.TemplateDetail.as_view(), name='mails.templates.view'),
+    url('^mails/templates/(?P<pk>[0-9]+)/send$', mails.TemplateMassMail.as_view(), name='mails.templates.send'),
     url('^templates/(?P<pk>[0-9]+)/delete$', mails.TemplateDelete.as_view(), name='mails.templates.delete'),
 ]
@@ -6,6 +6,7 @@ from django.utils.translation import ugettext_lazy as _
 from django.views.generic import DetailView, FormView, ListView
 
 from byro.bookkeeping.models import Account, VirtualTransaction
+from byro.office.views.pagination import KeysetPaginationMixin
 
 FORM_CLASS = forms.modelform_factory(Account, fields=['name', 'account_category'])
 
@@ -15,6 +16,9 @@ class AccountListView(ListView):
     context_object_name = 'accounts'
     model = Account
 
+    def get_queryset(self):
+        return Account.objects.with_totals().order_by('account_category', 'name', 'pk')
+
 
 class AccountCreateView(FormView):
     template_name = 'office/account/add.html'
@@ -31,17 +35,17 @@ class AccountCreateView(FormView):
         return reverse('office:accounts.detail', kwargs={'pk': self.form.instance.pk})
 
 
-class AccountDetailView(ListView):
+class AccountDetailView(KeysetPaginationMixin, ListView):
     template_name = 'office/account/detail.html'
     context_object_name = 'transactions'
     model = VirtualTransaction
-    paginate_by = 25
+    page_size = 25
 
     def get_object(self):
         return Account.objects.get(pk=self.kwargs['pk'])
 
     def get_queryset(self):
-        return self.get_object().transactions.filter(value_datetime__lte=now()).order_by('-value_datetime')
+        return self.get_object().transactions.filter(value_datetime__lte=now())
 
     def get_form(self):
         return FORM_CLASS(instance=self.get_object(), data=self.request.POST if self.request.method == 'post' else None)
@@ -1,17 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.views.generic import TemplateView
 
 from byro.bookkeeping.models import RealTransaction
 from byro.members.models import Member, Membership
 from byro.members.stats import get_member_statistics
 
+DASHBOARD_CACHE_KEY = 'office_dashboard_metrics'
+
+
+def get_dashboard_metrics() -> dict:
+    """
+    Returns the dashboard figures from the cache, computing them if needed.
+    They are invalidated by writes to members, memberships and transactions
+    in this process, and expire after ``DASHBOARD_CACHE_TIMEOUT`` seconds to
+    bound the staleness caused by other processes.
+    """
+    metrics = cache.get(DASHBOARD_CACHE_KEY)
+    if metrics is None:
+        metrics = {
+            'member_count': Member.objects.all().count(),
+            'active_count': Membership.objects.filter(end__isnull=True).count(),
+            'unmapped_transactions_count': RealTransaction.objects.filter(is_matched=False).count(),
+            'stats': get_member_statistics(),
+        }
+        cache.set(DASHBOARD_CACHE_KEY, metrics, settings.DASHBOARD_CACHE_TIMEOUT)
+    return metrics
+
+
+def invalidate_dashboard_metrics():
+    cache.delete(DASHBOARD_CACHE_KEY)
+
 
 class DashboardView(TemplateView):
     template_name = 'office/dashboard.html'
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        context['member_count'] = Member.objects.all().count()
-        context['active_count'] = Membership.objects.filter(end__isnull=True).count()
-        context['unmapped_transactions_count'] = RealTransaction.objects.filter(virtual_transactions__isnull=True).count()
-        context['stats'] = get_member_statistics()
+        context.update(get_dashboard_metrics())
         return context
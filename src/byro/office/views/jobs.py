@@ -0,0 +1,38 @@
+from django.contrib import messages
+from django.shortcuts import redirect
+from django.utils.translation import ugettext_lazy as _
+from django.views.generic import DetailView, ListView, View
+from django.views.generic.detail import SingleObjectMixin
+
+from byro.common.models import Job, JobState
+
+
+def redirect_to_job(request, job):
+    messages.info(request, _('The job has been queued and will be processed in the background.'))
+    return redirect('office:jobs.detail', pk=job.pk)
+
+
+class JobListView(ListView):
+    template_name = 'office/jobs/list.html'
+    context_object_name = 'jobs'
+    paginate_by = 50
+
+    def get_queryset(self):
+        return Job.objects.order_by('-queued')
+
+
+class JobDetailView(DetailView):
+    template_name = 'office/jobs/detail.html'
+    context_object_name = 'job'
+    model = Job
+
+
+class JobRetryView(SingleObjectMixin, View):
+    model = Job
+
+    def post(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.state == JobState.FAILED:
+            job.retry()
+            messages.success(request, _('The job has been queued again.'))
+        return redirect('office:jobs.detail', pk=job.pk)
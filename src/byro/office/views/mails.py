@@ -1,10 +1,16 @@
 from django import forms
 from django.contrib import messages
-from django.shortcuts import redirect, reverse
+from django.shortcuts import get_object_or_404, redirect, reverse
+from django.utils.http import urlencode
 from django.utils.translation import ugettext_lazy as _
-from django.views.generic import ListView, UpdateView, View
+from django.views.generic import ListView, TemplateView, UpdateView, View
 
+from byro.common.models import Job
 from byro.mails.models import EMail, MailTemplate
+from byro.mails.send import SendMailException
+from byro.members.models import Member
+from byro.office.views.jobs import redirect_to_job
+from byro.office.views.members import filter_members
 
 
 class MailDetail(UpdateView):
@@ -69,18 +75,13 @@ class OutboxSend(View):
         return qs
 
     def dispatch(self, request, *args, **kwargs):
-        qs = self.get_queryset()
-        length = len(qs)
-        for mail in qs:
-            mail.send()
-        if length > 1:
-            message = _('{count} mails have been sent.').format(count=length)
-        elif length == 1:
-            message = _('The mail has been sent.')
-        else:
-            message = _('No mail has been sent.')
-        messages.success(request, message)
-        return redirect(reverse('office:mails.outbox.list'))
+        mails = list(self.get_queryset().values_list('pk', flat=True))
+        if not mails:
+            messages.success(request, _('No mail has been sent.'))
+            return redirect(reverse('office:mails.outbox.list'))
+        # Sending by hand retries mails that failed before right away
+        self.get_queryset().update(attempts=0, next_attempt=None)
+        return redirect_to_job(request, Job.enqueue('mails.send', mails=mails))
 
 
 class SentMail(ListView):
@@ -103,5 +104,35 @@ class TemplateDetail(UpdateView):
     success_url = '/mails/templates'
 
 
+class TemplateMassMail(TemplateView):
+    """
+    Creates mails from a template for all members matching the filters of
+    the member list, after showing how many members that are.
+    """
+    template_name = 'office/mails/template_mass_mail.html'
+
+    def get_template_object(self):
+        return get_object_or_404(MailTemplate, pk=self.kwargs['pk'])
+
+    def get_members(self, params):
+        return filter_members(Member.objects.all(), params).with_email()
+
+    def get_context_data(self, *args, **kwargs):
+        ctx = super().get_context_data(*args, **kwargs)
+        ctx['template'] = self.get_template_object()
+        ctx['count'] = self.get_members(self.request.GET).count()
+        return ctx
+
+    def post(self, request, *args, **kwargs):
+        try:
+            count = self.get_template_object().to_mails(self.get_members(request.POST))
+        except SendMailException as e:
+            messages.error(request, str(e))
+            params = {key: request.POST.get(key, '') for key in ('filter', 'q', 'owing')}
+            return redirect('{}?{}'.format(request.path, urlencode(params)))
+        messages.success(request, _('{count} mails have been added to the outbox.').format(count=count))
+        return redirect(reverse('office:mails.outbox.list'))
+
+
 class TemplateDelete(View):  # TODO
     pass
@@ -1,7 +1,14 @@
+import hashlib
+from contextlib import suppress
+from decimal import Decimal, InvalidOperation
+
 from django import forms
+from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse
@@ -9,7 +16,8 @@ from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import DetailView, FormView, ListView, View
 
-from byro.common.models import Configuration
+from byro.common.models import Configuration, Job
+from byro.common.search import search_members
 from byro.members.forms import CreateMemberForm
 from byro.members.models import Member, Membership
 from byro.members.signals import (
@@ -17,6 +25,8 @@ from byro.members.signals import (
     new_member, new_member_mail_information, new_member_office_mail_information,
 )
 from byro.office.signals import member_view
+from byro.office.views.jobs import redirect_to_job
+from byro.office.views.pagination import KeysetPaginationMixin
 
 
 class MemberView(DetailView):
@@ -33,33 +43,54 @@ class MemberView(DetailView):
         return ctx
 
 
-class MemberListView(ListView):
+def filter_members(queryset, params):
+    """
+    Applies the filters of the member list in ``params`` to a Member
+    queryset: a search term, the membership status and a minimum debt.
+    """
+    search = params.get('q')
+    _filter = params.get('filter')
+    if search:
+        queryset = search_members(queryset, search)
+    # Filter via subqueries: joining memberships would multiply the balance sums
+    if _filter == 'inactive':
+        queryset = queryset.filter(pk__in=Membership.objects.filter(end__isnull=False).values('member'))
+    elif _filter != 'all':
+        queryset = queryset.filter(pk__in=Membership.objects.filter(end__isnull=True).values('member'))
+    queryset = queryset.with_balance()
+    owing = params.get('owing')
+    if owing:
+        with suppress(InvalidOperation):
+            queryset = queryset.filter(fee_balance__lt=-Decimal(owing))
+    return queryset
+
+
+class MemberListView(KeysetPaginationMixin, ListView):
     template_name = 'office/member/list.html'
     context_object_name = 'members'
     model = Member
-    paginate_by = 50
+    page_size = 50
+    # Number and name are nullable, so the keysets use non-null annotations
+    orderings = {
+        'number': ('sort_number', '-id'),
+        '-number': ('-sort_number', '-id'),
+        'name': ('sort_name', '-id'),
+        '-name': ('-sort_name', '-id'),
+        'balance': ('fee_balance', '-id'),
+        '-balance': ('-fee_balance', '-id'),
+    }
+
+    def get_keyset(self):
+        return self.orderings.get(self.request.GET.get('ordering'), ('-id', ))
 
     def get_queryset(self):
-        search = self.request.GET.get('q')
-        _filter = self.request.GET.get('filter')
-        qs = Member.objects.all()
-        if search:
-            qs = qs.filter(Q(name__icontains=search) | Q(number=search))
-        if _filter:
-            if _filter == 'inactive':
-                qs = qs.filter(memberships__end__isnull=False)
-            elif _filter == 'all':
-                pass
-            else:
-                qs = qs.filter(memberships__end__isnull=True)
-        else:
-            qs = qs.filter(memberships__end__isnull=True)
-        return qs.order_by('-id').distinct()
+        return filter_members(Member.objects.all(), self.request.GET).annotate(
+            sort_number=Coalesce('number', Value('')),
+            sort_name=Coalesce('name', Value('')),
+        )
 
     def post(self, request, *args, **kwargs):
-        for member in Member.objects.all():
-            member.update_liabilites()
-        return redirect(request.path)
+        return redirect_to_job(request, Job.enqueue('members.update_liabilities'))
 
 
 class MemberCreateView(FormView):
@@ -251,23 +282,37 @@ class MemberLeaveView(MemberView, FormView):
 
 
 class MemberListTypeaheadView(View):
+    """
+    Returns at most ``limit`` members matching the ``search`` parameter,
+    best matches first. Results are read in a single query without loading
+    profile objects, and cached for ``TYPEAHEAD_CACHE_TIMEOUT`` seconds.
+    """
+    limit = 10
+    min_length = 2
+
+    def get_results(self, search):
+        queryset = search_members(Member.objects.all(), search, rank=True)
+        return [
+            {
+                'id': pk,
+                'number': number,
+                'nick': nick,
+                'name': name,
+            }
+            for pk, number, name, nick in queryset.values_list('pk', 'number', 'name', 'profile_profile__nick')[:self.limit]
+        ]
 
     def dispatch(self, request, *args, **kwargs):
-        search = request.GET.get('search')
-        if not search or len(search) < 2:
+        search = (request.GET.get('search') or '').strip()
+        if len(search) < self.min_length:
             return JsonResponse({'count': 0, 'results': []})
 
-        queryset = Member.objects.filter(
-            Q(name__icontains=search) | Q(profile_profile__nick__icontains=search)
-        )
+        key = 'member_typeahead:{}'.format(hashlib.md5(search.lower().encode()).hexdigest())
+        results = cache.get(key)
+        if results is None:
+            results = self.get_results(search)
+            cache.set(key, results, settings.TYPEAHEAD_CACHE_TIMEOUT)
         return JsonResponse({
-            'count': len(queryset),
-            'results': [
-                {
-                    'id': member.pk,
-                    'nick': member.profile_profile.nick,
-                    'name': member.name,
-                }
-                for member in queryset
-            ],
+            'count': len(results),
+            'results': results,
         })
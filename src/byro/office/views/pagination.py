@@ -0,0 +1,158 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Q
+
+
+def _encode_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError('Cannot use {} in a pagination cursor.'.format(type(value)))
+
+
+class KeysetPage:
+
+    def __init__(self, object_list, next_query=None, previous_query=None, estimated_count=None):
+        self.object_list = object_list
+        self.next_query = next_query
+        self.previous_query = previous_query
+        self.estimated_count = estimated_count
+
+    @property
+    def has_other_pages(self):
+        return bool(self.next_query or self.previous_query)
+
+
+class KeysetPaginationMixin:
+    """
+    Pagination for ListViews by the values of the last shown row instead of
+    an OFFSET, so that every page costs the same, however far back it is.
+
+    ``keyset`` lists the fields (or annotations) the queryset is ordered by,
+    ending with a unique one. The ``after`` and ``before`` URL parameters
+    hold cursor tokens pointing at the adjacent rows. With
+    ``estimate_count``, the page shows the planner's estimate of the number
+    of rows instead of counting them.
+    """
+    keyset = ('-value_datetime', '-id')
+    page_size = 50
+    estimate_count = False
+
+    def get_keyset(self):
+        return self.keyset
+
+    def encode_cursor(self, obj, keyset) -> str:
+        values = [getattr(obj, field.lstrip('-')) for field in keyset]
+        data = json.dumps([list(keyset), values], default=_encode_value)
+        return urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token: str, keyset):
+        try:
+            data = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode())
+            cursor_keyset, values = data
+        except (TypeError, ValueError):
+            return None
+        if cursor_keyset != list(keyset) or len(values) != len(keyset):
+            return None
+        return values
+
+    def get_keyset_fields(self, queryset, keyset):
+        """
+        Returns the model fields of ``keyset``, or None if it contains
+        annotations or mixes ascending and descending order.
+        """
+        if len({field.startswith('-') for field in keyset}) > 1:
+            return None
+        fields = []
+        for field in keyset:
+            try:
+                model_field = queryset.model._meta.get_field(field.lstrip('-'))
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                return None
+            fields.append(model_field)
+        return fields
+
+    def seek(self, queryset, keyset, values, backwards=False):
+        """
+        Filters ``queryset`` to the rows following ``values`` in the order of
+        ``keyset``, or preceding them with ``backwards``.
+
+        If possible, this is a row value comparison like ``(value_datetime,
+        id) < (%s, %s)``, which PostgreSQL can answer from an index on these
+        columns. Otherwise, it is expanded to ``a < x OR (a = x AND b < y)``.
+        """
+        fields = self.get_keyset_fields(queryset, keyset)
+        if fields:
+            descending = keyset[0].startswith('-') != backwards
+            qn = connection.ops.quote_name
+            columns = ['{}.{}'.format(qn(queryset.model._meta.db_table), qn(field.column)) for field in fields]
+            return queryset.extra(
+                where=['({}) {} ({})'.format(', '.join(columns), '<' if descending else '>', ', '.join(['%s'] * len(fields)))],
+                params=[field.get_db_prep_value(field.to_python(value), connection) for field, value in zip(fields, values)],
+            )
+        condition = Q()
+        for index, field in enumerate(keyset):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != backwards
+            step = Q(**{name + ('__lt' if descending else '__gt'): values[index]})
+            for previous_field, value in zip(keyset[:index], values):
+                step &= Q(**{previous_field.lstrip('-'): value})
+            condition |= step
+        return queryset.filter(condition)
+
+    def get_estimated_count(self, queryset):
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+                return max(int(row[0]), 0) if row else None
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            return cursor.fetchone()[0][0]['Plan']['Plan Rows']
+
+    def get_query(self, **params):
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query.update(params)
+        return query.urlencode()
+
+    def get_keyset_page(self, queryset) -> KeysetPage:
+        keyset = self.get_keyset()
+        after = self.decode_cursor(self.request.GET.get('after', ''), keyset)
+        before = self.decode_cursor(self.request.GET.get('before', ''), keyset) if not after else None
+
+        qs = queryset.order_by(*keyset)
+        if after:
+            qs = self.seek(qs, keyset, after)
+        elif before:
+            reversed_keyset = [field[1:] if field.startswith('-') else '-' + field for field in keyset]
+            qs = self.seek(queryset, keyset, before, backwards=True).order_by(*reversed_keyset)
+        rows = list(qs[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if before:
+            rows.reverse()
+
+        has_next = has_more if not before else True
+        has_previous = bool(after) or (before and has_more)
+        return KeysetPage(
+            object_list=rows,
+            next_query=self.get_query(after=self.encode_cursor(rows[-1], keyset)) if rows and has_next else None,
+            previous_query=self.get_query(before=self.encode_cursor(rows[0], keyset)) if rows and has_previous else None,
+            estimated_count=self.get_estimated_count(queryset) if self.estimate_count else None,
+        )
+
+    def get_context_data(self, *args, **kwargs):
+        page = self.get_keyset_page(kwargs.pop('object_list', self.object_list))
+        context = super().get_context_data(*args, object_list=page.object_list, **kwargs)
+        context['keyset_page'] = page
+        return context
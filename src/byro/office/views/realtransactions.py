@@ -1,35 +1,55 @@
-from django.db.models import Q
+from django import forms
+from django.contrib import messages
 from django.forms.models import BaseModelFormSet, inlineformset_factory
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.utils.functional import cached_property
+from django.utils.translation import ugettext_lazy as _
 from django.views.generic import ListView, TemplateView
 
-from byro.bookkeeping.forms import VirtualTransactionForm
-from byro.bookkeeping.models import RealTransaction, VirtualTransaction
+from byro.bookkeeping.forms import VirtualTransactionForm, split_transactions
+from byro.bookkeeping.models import (
+    ClosedPeriodError, RealTransaction, VirtualTransaction,
+)
+from byro.common.search import search_transactions
+from byro.office.views.pagination import KeysetPaginationMixin
 
 
-class RealTransactionListView(ListView):
+class RealTransactionListView(KeysetPaginationMixin, ListView):
     template_name = 'office/realtransaction/list.html'
     context_object_name = 'transactions'
-    paginate_by = 25
+    page_size = 25
+    estimate_count = True
     model = RealTransaction
 
     def get_queryset(self):
-        qs = super().get_queryset().order_by('-value_datetime')
+        qs = super().get_queryset()
         if self.request.GET.get('filter') == 'matched':
-            qs = qs.filter(virtual_transactions__isnull=False)
+            qs = qs.filter(is_matched=True)
         elif self.request.GET.get('filter') == 'unmatched':
-            qs = qs.filter(virtual_transactions__isnull=True)
+            qs = qs.filter(is_matched=False)
         year = self.request.GET.get('year')
         if year is not None and year.isdigit():
             qs = qs.filter(value_datetime__year=year)
         search = self.request.GET.get('q')
         if search:
-            qs = qs.filter(Q(purpose__icontains=search) | Q(originator__icontains=search))
+            qs = search_transactions(qs, search)
         return qs
 
 
+class RealTransactionQueueView(KeysetPaginationMixin, ListView):
+    """
+    Pages through the unmatched transactions, newest first, using the
+    partial index on unmatched transactions.
+    """
+    template_name = 'office/realtransaction/queue.html'
+    context_object_name = 'transactions'
+    page_size = 25
+
+    def get_queryset(self):
+        return RealTransaction.objects.filter(is_matched=False)
+
+
 class RealTransactionMatchView(TemplateView):
     template_name = 'office/realtransaction/match.html'
 
@@ -42,22 +62,19 @@ class RealTransactionMatchView(TemplateView):
     def post(self, request, *args, **kwargs):
         formset = self.get_formset()
         if formset.is_valid():
-            for transaction in self.get_queryset():
-                for form in formset:
-                    if form.instance and (form.instance.source_account or form.instance.destination_account):
-                        VirtualTransaction.objects.create(
-                            real_transaction=transaction,
-                            value_datetime=transaction.value_datetime,
-                            source_account=form.instance.source_account,
-                            destination_account=form.instance.destination_account,
-                            member=form.instance.member,
-                            amount=form.instance.amount or transaction.amount,
-                        )
-        else:
-            # TODO: messages
-            raise Exception('invalid data: ' + str(formset.errors))
-
-        return HttpResponseRedirect(reverse('office:realtransactions.list'))
+            lines = [
+                form.cleaned_data for form in formset.forms
+                if form not in formset.deleted_forms
+                and (form.cleaned_data.get('source_account') or form.cleaned_data.get('destination_account'))
+            ]
+            try:
+                VirtualTransaction.objects.create_bulk(split_transactions(self.get_queryset(), lines))
+            except (forms.ValidationError, ClosedPeriodError) as e:
+                messages.error(request, e.messages[0] if isinstance(e, forms.ValidationError) else str(e))
+            else:
+                messages.success(request, _('The transactions have been matched.'))
+                return HttpResponseRedirect(reverse('office:realtransactions.list'))
+        return self.render_to_response(self.get_context_data(formset=formset))
 
     @cached_property
     def formset_class(self):
@@ -76,5 +93,5 @@ class RealTransactionMatchView(TemplateView):
     def get_context_data(self, *args, **kwargs):
         ctx = super().get_context_data(*args, **kwargs)
         ctx['transactions'] = self.get_queryset()
-        ctx['formset'] = self.get_formset()
+        ctx['formset'] = kwargs.get('formset') or self.get_formset()
         return ctx
@@ -1,10 +1,11 @@
 from django import forms
 from django.contrib import messages
-from django.shortcuts import redirect
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import DetailView, FormView, ListView
 
 from byro.bookkeeping.models import RealTransactionSource
+from byro.common.models import Job
+from byro.office.views.jobs import redirect_to_job
 
 
 class UploadForm(forms.ModelForm):
@@ -27,16 +28,8 @@ class CsvUploadView(FormView):
 
     def form_valid(self, form):
         form.save()
-        try:
-            form.instance.process()
-            messages.success(self.request, _('The upload was processed successfully.'))
-        except Exception as e:
-            messages.error(self.request, _('The upload was added successfully, but could not be processed: ') + str(e))
-        self.form = form
-        return super().form_valid(form)
-
-    def get_success_url(self):
-        return self.request.path
+        messages.success(self.request, _('The upload was added successfully.'))
+        return redirect_to_job(self.request, Job.enqueue('bookkeeping.process_upload', source=form.instance.pk))
 
 
 class UploadProcessView(DetailView):
@@ -44,12 +37,7 @@ class UploadProcessView(DetailView):
 
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
-        try:
-            obj.process()
-            messages.success(self.request, _('The upload was processed successfully.'))
-        except Exception as e:
-            messages.error(self.request, _('The upload could not be processed: ') + str(e))
-        return redirect('office:uploads.list')
+        return redirect_to_job(request, Job.enqueue('bookkeeping.process_upload', source=obj.pk))
 
 
 class UploadMatchView(DetailView):
@@ -57,12 +45,4 @@ class UploadMatchView(DetailView):
 
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
-        errors = success = 0
-        for real_transaction in obj.transactions.all():
-            try:
-                real_transaction.derive_virtual_transactions()
-                success += 1
-            except Exception as e:
-                errors += 1
-        messages.info(request, '{success} successful matches, {errors} errors.'.format(success=success, errors=errors))
-        return redirect('office:uploads.list')
+        return redirect_to_job(request, Job.enqueue('bookkeeping.match_upload', source=obj.pk))
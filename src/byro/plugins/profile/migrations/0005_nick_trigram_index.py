@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    from byro.common.search import create_trigram_index
+    create_trigram_index(schema_editor, 'profile_memberprofile', 'nick')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile', '0004_auto_20171206_1919'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, migrations.RunPython.noop),
+    ]
@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'compressor',
     'bootstrap4',
@@ -74,6 +75,7 @@ with suppress(ImportError):
     INSTALLED_APPS.append('django_extensions')
 
 MIDDLEWARE = [
+    'byro.common.middleware.ConfigurationCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -170,6 +172,42 @@ FORMAT_MODULE_PATH = [
 
 
 
+# ######### CACHE CONFIGURATION
+# Use a shared cache (e.g. memcached) if you run more than one process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# Maximum age of the dashboard figures in seconds. They are invalidated on
+# changes within the same process, other processes see them after this time.
+DASHBOARD_CACHE_TIMEOUT = 300
+# Member typeahead results are cached for this many seconds per search term.
+TYPEAHEAD_CACHE_TIMEOUT = 30
+# ######### END CACHE CONFIGURATION
+
+# Number of rows committed at once when importing bank transactions.
+TRANSACTION_IMPORT_BATCH_SIZE = 500
+# Incoming payments with one of these words in their purpose are booked as
+# donations by the built-in transaction matcher.
+TRANSACTION_MATCHING_DONATION_KEYWORDS = ['spende', 'donation']
+# Membership numbers are only matched after one of these words, e.g.
+# "Mitgliedsnr. 17", unless they are at least this long.
+TRANSACTION_MATCHING_NUMBER_PREFIXES = ['mitglied', 'member', 'nr', 'nummer', 'number']
+TRANSACTION_MATCHING_MIN_NUMBER_LENGTH = 6
+
+# Number of mails sent over one SMTP connection when the outbox is sent.
+MAIL_BATCH_SIZE = 100
+# Maximum number of mails sent per minute, or None for no limit.
+MAIL_RATE_LIMIT = None
+# Failed mails are retried after this many seconds, doubling with each
+# attempt, until they have failed MAIL_MAX_ATTEMPTS times.
+MAIL_RETRY_DELAY = 60
+MAIL_MAX_ATTEMPTS = 5
+# Maximum total size in bytes of the attachments kept in memory while
+# sending, so that a document sent to many members is read only once.
+MAIL_ATTACHMENT_CACHE_SIZE = 20 * 1024 * 1024
+
 # ######### MEDIA CONFIGURATION
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#media-root
 MEDIA_ROOT = os.path.join(BASE_DIR, 'byro/media')
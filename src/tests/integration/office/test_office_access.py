@@ -11,6 +11,7 @@ from django.shortcuts import reverse
     'members.add',
     'realtransactions.list',
     'realtransactions.match',
+    'realtransactions.queue',
     'uploads.list',
     'uploads.add',
     'accounts.list',
@@ -20,6 +21,7 @@ from django.shortcuts import reverse
     'mails.outbox.send',
     'mails.outbox.purge',
     'mails.templates.list',
+    'jobs.list',
 ))
 @pytest.mark.parametrize('logged_in', (True, False))
 @pytest.mark.django_db
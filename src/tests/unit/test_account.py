@@ -0,0 +1,40 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from byro.bookkeeping.models import Account, AccountCategory, VirtualTransaction
+
+
+@pytest.mark.django_db
+def test_with_totals_matches_account_methods(django_assert_max_num_queries):
+    income = Account.objects.create(account_category=AccountCategory.INCOME, name='Donations')
+    asset = Account.objects.create(account_category=AccountCategory.ASSET, name='Bank')
+    for days, amount in ((40, '10.00'), (10, '5.50'), (-3, '100.00')):
+        VirtualTransaction.objects.create(
+            source_account=income, destination_account=asset,
+            amount=Decimal(amount), value_datetime=now() - timedelta(days=days),
+        )
+
+    start = now() - timedelta(days=20)
+    for kwargs in ({}, {'start': start}):
+        with django_assert_max_num_queries(1):
+            accounts = list(Account.objects.with_totals(**kwargs))
+        for account in accounts:
+            with django_assert_max_num_queries(1):
+                assert account.incoming == account.total_in(**kwargs)
+            assert account.outgoing == account.total_out(**kwargs)
+            assert account.total_balance == account.balance(**kwargs)
+
+    bank = Account.objects.with_totals().get(pk=asset.pk)
+    assert bank.total_balance == Decimal('15.50')
+
+
+@pytest.mark.django_db
+def test_account_list(logged_in_client, django_assert_max_num_queries):
+    for number in range(5):
+        Account.objects.create(account_category=AccountCategory.EXPENSE, name=str(number))
+    with django_assert_max_num_queries(10):
+        response = logged_in_client.get('/accounts/')
+    assert response.status_code == 200
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+
+from byro.common.models import Configuration
+from byro.common.models.configuration import (
+    end_request_cache, start_request_cache,
+)
+
+
+@pytest.fixture
+def request_cache():
+    start_request_cache()
+    yield
+    end_request_cache()
+
+
+@pytest.mark.django_db
+def test_configuration_cached_per_request(request_cache, django_assert_num_queries):
+    config = Configuration.get_solo()
+    with django_assert_num_queries(0):
+        assert Configuration.get_solo() is config
+
+
+@pytest.mark.django_db
+def test_configuration_save_invalidates(request_cache):
+    config = Configuration.get_solo()
+    config.name = 'The new club name'
+    config.save()
+    assert Configuration.get_solo().name == 'The new club name'
+    assert Configuration.get_solo() is not config
+
+
+@pytest.mark.django_db
+def test_configuration_not_shared_between_requests():
+    start_request_cache()
+    config = Configuration.get_solo()
+    config.name = 'Unsaved change'
+    end_request_cache()
+    assert Configuration.get_solo().name != 'Unsaved change'
+
+
+@pytest.mark.django_db
+def test_configuration_fields_not_shared_between_requests(monkeypatch):
+    config = Configuration.get_solo()
+    config.registration_form = [{'name': 'member__number'}]
+    config.save()
+    # Tests run in a transaction, which keeps the process cache empty
+    monkeypatch.setattr('byro.common.models.configuration.connection', SimpleNamespace(in_atomic_block=False))
+    try:
+        for _ in range(2):
+            start_request_cache()
+            Configuration.get_solo().registration_form.append({'name': 'unsaved'})
+            end_request_cache()
+        assert Configuration.get_solo().registration_form == [{'name': 'member__number'}]
+    finally:
+        Configuration.clear_cache()
@@ -0,0 +1,35 @@
+import pytest
+
+from byro.common.context_processors import byro_information
+
+
+@pytest.mark.django_db
+def test_pending_mails_counted_lazily(rf, email, sent_email, django_assert_num_queries):
+    ctx = byro_information(rf.get('/'))
+    with django_assert_num_queries(1):
+        assert ctx['pending_mails']
+        assert int(str(ctx['pending_mails'])) == 1
+
+
+@pytest.mark.django_db
+def test_version_resolved_once(rf, settings, monkeypatch):
+    import subprocess
+    from byro.common.version import get_version_info
+
+    settings.DEBUG = True
+    get_version_info.cache_clear()
+    calls = []
+    monkeypatch.setattr(subprocess, 'check_output', lambda *args, **kwargs: calls.append(args) or b'v1.0-abc\n')
+    for _ in range(3):
+        assert byro_information(rf.get('/'))['byro_version'] == 'v1.0-abc'
+    assert len(calls) == 1
+    get_version_info.cache_clear()
+
+
+@pytest.mark.django_db
+def test_health_endpoint(client):
+    response = client.get('/health')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['status'] == 'ok'
+    assert set(data) == {'status', 'version', 'commit'}
@@ -0,0 +1,39 @@
+import pytest
+
+from byro.bookkeeping.models import Account, AccountCategory, VirtualTransaction
+from byro.members.models import Member
+from byro.office.views.dashboard import (
+    get_dashboard_metrics, invalidate_dashboard_metrics,
+)
+
+
+@pytest.mark.django_db
+def test_dashboard_metrics_cached(member, real_transaction, django_assert_num_queries):
+    invalidate_dashboard_metrics()
+    metrics = get_dashboard_metrics()
+    assert metrics['unmapped_transactions_count'] == 1
+    with django_assert_num_queries(0):
+        assert get_dashboard_metrics() == metrics
+
+
+@pytest.mark.django_db
+def test_dashboard_metrics_invalidated():
+    invalidate_dashboard_metrics()
+    count = get_dashboard_metrics()['member_count']
+    member = Member.objects.create(number='dashboard')
+    assert get_dashboard_metrics()['member_count'] == count + 1
+    [profile.delete() for profile in member.profiles]
+    member.delete()
+    assert get_dashboard_metrics()['member_count'] == count
+
+
+@pytest.mark.django_db
+def test_dashboard_metrics_invalidated_by_bulk_match(real_transaction):
+    invalidate_dashboard_metrics()
+    assert get_dashboard_metrics()['unmapped_transactions_count'] == 1
+    VirtualTransaction.objects.create_bulk([VirtualTransaction(
+        real_transaction=real_transaction, amount=real_transaction.amount,
+        destination_account=Account.objects.get(account_category=AccountCategory.MEMBER_FEES),
+        value_datetime=real_transaction.value_datetime,
+    )])
+    assert get_dashboard_metrics()['unmapped_transactions_count'] == 0
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils.timezone import localtime, now
+
+from byro.bookkeeping.models import (
+    Account, AccountCategory, ClosedPeriodError,
+    FiscalPeriod, VirtualTransaction,
+)
+
+
+@pytest.fixture
+def accounts():
+    return (
+        Account.objects.create(account_category=AccountCategory.INCOME, name='Donations'),
+        Account.objects.create(account_category=AccountCategory.ASSET, name='Bank'),
+    )
+
+
+@pytest.fixture
+def booked(accounts):
+    income, asset = accounts
+    return [
+        VirtualTransaction.objects.create(
+            source_account=income, destination_account=asset,
+            amount=Decimal(days), value_datetime=now() - timedelta(days=days),
+        )
+        for days in (100, 60, 30, 5)
+    ]
+
+
+def totals():
+    return {
+        account.pk: (account.incoming, account.outgoing, account.total_balance)
+        for account in Account.objects.with_totals()
+    }
+
+
+@pytest.mark.django_db
+def test_balance_uses_snapshot(accounts, booked, django_assert_num_queries):
+    income, asset = accounts
+    before = totals()
+    call_command('close_period', '{:%Y-%m-%d}'.format(localtime(now() - timedelta(days=45))))
+
+    period = FiscalPeriod.objects.get()
+    assert period.snapshots.get(account=asset).incoming == Decimal('160.00')
+    assert totals() == before
+    with django_assert_num_queries(1):
+        assert asset.balance() == Decimal('195.00')
+    assert income.total_out(start=now() - timedelta(days=40)) == Decimal('35.00')
+
+    with pytest.raises(CommandError):
+        call_command('close_period', '{:%Y-%m-%d}'.format(localtime(now() - timedelta(days=50))))
+
+
+@pytest.mark.django_db
+def test_closed_period_is_protected(accounts, booked):
+    FiscalPeriod.objects.close(now() - timedelta(days=45))
+    old, recent = booked[0], booked[-1]
+
+    old.amount = Decimal('1.00')
+    with pytest.raises(ClosedPeriodError):
+        old.save()
+    with pytest.raises(ClosedPeriodError), transaction.atomic():
+        old.delete()
+
+    recent.value_datetime = now() - timedelta(days=50)
+    with pytest.raises(ClosedPeriodError):
+        recent.save()
+
+    recent.value_datetime = now() - timedelta(days=1)
+    recent.save()
+    with pytest.raises(ClosedPeriodError):
+        VirtualTransaction.objects.create(
+            source_account=accounts[0], destination_account=accounts[1],
+            amount=Decimal('1.00'), value_datetime=now() - timedelta(days=90),
+        )
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+
+from byro.common.jobs import register_job
+from byro.common.models import Job, JobState
+
+
+@register_job('tests.add')
+def add_job(job, a, b):
+    job.set_progress(1, total=1)
+    return {'sum': a + b}
+
+
+@register_job('tests.fail', max_attempts=2)
+def fail_job(job):
+    raise ValueError('Nope')
+
+
+@pytest.mark.django_db
+def test_job_run():
+    job = Job.enqueue('tests.add', a=1, b=2)
+    assert Job.objects.fetch() == job
+    assert Job.objects.fetch() is None
+    job.refresh_from_db()
+    assert job.state == JobState.RUNNING
+    job.run()
+    job.refresh_from_db()
+    assert job.state == JobState.DONE
+    assert job.result == {'sum': 3}
+    assert job.percentage == 100
+
+
+@pytest.mark.django_db
+def test_job_retry_and_fail():
+    job = Job.enqueue('tests.fail')
+    Job.objects.fetch().run()
+    job.refresh_from_db()
+    assert job.state == JobState.QUEUED
+    assert 'Nope' in job.error
+    assert Job.objects.fetch() is None  # backoff
+
+    job.run_after = job.queued
+    job.save()
+    Job.objects.fetch().run()
+    job.refresh_from_db()
+    assert job.state == JobState.FAILED
+    assert job.attempts == 2
+
+    job.retry()
+    assert Job.objects.fetch() == job
+
+
+@pytest.mark.django_db
+def test_worker_runs_queued_jobs():
+    jobs = [Job.enqueue('tests.add', a=index, b=1) for index in range(3)]
+    call_command('byro_worker', once=True)
+    for index, job in enumerate(jobs):
+        job.refresh_from_db()
+        assert job.state == JobState.DONE
+        assert job.result == {'sum': index + 1}
+
+
+def test_unknown_job():
+    with pytest.raises(KeyError):
+        Job.enqueue('tests.unknown')
+
+
+@pytest.mark.django_db
+def test_rebuild_is_queued(logged_in_client, membership):
+    response = logged_in_client.post('/members/list', follow=True)
+    job = response.context['job']
+    assert job.name == 'members.update_liabilities'
+    call_command('byro_worker', once=True)
+    job.refresh_from_db()
+    assert job.result == {'created': 2, 'updated': 0, 'deleted': 0}
+
+
+@pytest.mark.django_db
+def test_stale_jobs_respect_max_attempts():
+    once = Job.enqueue('tests.fail')
+    once.max_attempts = 1
+    once.save()
+    twice = Job.enqueue('tests.fail')
+    for job in (Job.objects.fetch(), Job.objects.fetch()):
+        job.heartbeat = job.heartbeat - timedelta(minutes=20)
+        job.save()
+
+    Job.objects.requeue_stale(timedelta(minutes=10))
+    once.refresh_from_db()
+    twice.refresh_from_db()
+    assert once.state == JobState.FAILED
+    assert 'stopped responding' in once.error
+    assert twice.state == JobState.QUEUED
+
+
+@pytest.mark.django_db
+def test_job_retry_requires_post(logged_in_client):
+    job = Job.enqueue('tests.fail')
+    assert logged_in_client.get('/jobs/{}/retry'.format(job.pk)).status_code == 405
@@ -1,6 +1,14 @@
 import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils.timezone import now
+from django.utils.translation import get_language
 
-from byro.mails.models import EMail
+from byro.documents.models import Document
+from byro.mails.models import EMail, MailTemplate
+from byro.mails.rendering import CompiledTemplate, get_compiled_template
+from byro.mails.send import SendMailException
+from byro.members.models import FeeIntervals, Member, Membership
 
 
 @pytest.mark.django_db
@@ -40,3 +48,124 @@ def test_mail_can_send_regular_mail(email):
     email.send()
     email.refresh_from_db()
     assert email.sent is not None
+
+
+@pytest.fixture
+def members():
+    members = [
+        Member.objects.create(number=str(index), name='Member {}'.format(index), email='member{}@localhost'.format(index))
+        for index in range(5)
+    ]
+    Member.objects.create(number='5', name='Member without mail')
+    for member in members[:3]:
+        Membership.objects.create(member=member, start=now().date(), amount=10, interval=FeeIntervals.MONTHLY)
+    return members
+
+
+@pytest.mark.django_db
+def test_template_to_mails(members, django_assert_num_queries):
+    template = MailTemplate.objects.create(subject='Hello {member_name}', text='Your number is {number}.')
+    document = Document.objects.create(document=SimpleUploadedFile('mail.txt', b'content'), title='Attachment')
+
+    with django_assert_num_queries(10):  # configuration, savepoint and release, members, two inserts per batch
+        count = template.to_mails(Member.all_objects.order_by('pk'), attachments=[document], batch_size=2)
+
+    assert count == 5
+    mails = list(EMail.objects.order_by('pk'))
+    assert [mail.to for mail in mails] == [member.email for member in members]
+    assert mails[1].subject == 'Hello Member 1'
+    assert mails[1].text == 'Your number is 1.'
+    assert all(mail.attachment_ids == [document.pk] for mail in mails)
+    document.document.delete()
+
+
+@pytest.mark.django_db
+def test_template_to_mails_missing_key(members):
+    template = MailTemplate.objects.create(subject='Hello {nick}', text='Hi')
+    with pytest.raises(SendMailException):
+        template.to_mails(Member.all_objects.all())
+    assert not EMail.objects.exists()
+
+
+@pytest.mark.django_db
+def test_template_to_mails_validates_once(members, mail_template, monkeypatch):
+    calls = []
+    validate = CompiledTemplate.validate
+    monkeypatch.setattr(CompiledTemplate, 'validate', lambda self, keys: calls.append(self) or validate(self, keys))
+    assert mail_template.to_mails(Member.all_objects.all()) == 5
+    assert len(calls) == 2
+
+
+@pytest.mark.django_db
+def test_template_to_mails_locale(members):
+    template = MailTemplate.objects.create(subject='{language}', text='Hi')
+    assert template.to_mails(Member.all_objects.all(), lambda member: {'language': get_language()}, locale='de') == 5
+    assert set(EMail.objects.values_list('subject', flat=True)) == {'de'}
+
+
+@pytest.mark.django_db
+def test_template_mass_mail_view(logged_in_client, members, mail_template):
+    url = '/mails/templates/{}/send'.format(mail_template.pk)
+    response = logged_in_client.get(url + '?filter=all')
+    assert response.context['count'] == 5
+    assert logged_in_client.get(url).context['count'] == 3
+
+    response = logged_in_client.post(url, {'filter': '', 'q': '', 'owing': ''})
+    assert response.status_code == 302
+    assert sorted(EMail.objects.values_list('to', flat=True)) == [member.email for member in members[:3]]
+
+
+@pytest.mark.django_db
+def test_template_mass_mail_view_errors(logged_in_client, members):
+    template = MailTemplate.objects.create(subject='Hello {nick}', text='Hi')
+    url = '/mails/templates/{}/send'.format(template.pk)
+    response = logged_in_client.post(url, {'filter': 'all', 'q': '', 'owing': ''})
+    assert response.status_code == 302
+    assert response['Location'] == url + '?filter=all&q=&owing='
+    assert not EMail.objects.exists()
+
+    assert logged_in_client.get('/mails/templates/{}/send'.format(template.pk + 1000)).status_code == 404
+
+
+def test_compiled_template():
+    template = CompiledTemplate('Dear {member_name}, your number is {number!s:>5} ({member.name}, {extra[0]})')
+    assert template.fields == {'member_name', 'number', 'member', 'extra'}
+    with pytest.raises(SendMailException) as excinfo:
+        template.validate(['member_name', 'number'])
+    assert 'extra, member' in str(excinfo.value)
+    with pytest.raises(SendMailException):
+        CompiledTemplate('Unbalanced {brace')
+
+    context = {'member_name': 'Ada', 'number': 17, 'member': Member(name='Ada Lovelace'), 'extra': ['x']}
+    assert template.render(context) == template.text.format_map(context)
+    template = CompiledTemplate('{{literal}} {amount:{width}.2f}')
+    assert template.fields == {'amount', 'width'}
+    assert template.render({'amount': 3.14159, 'width': 6}) == '{literal}   3.14'
+
+
+@pytest.mark.django_db
+def test_template_validates_placeholders(logged_in_client, mail_template):
+    with pytest.raises(ValidationError) as excinfo:
+        MailTemplate(subject='Hello {nick}', text='Hi {member_name}').full_clean()
+    assert list(excinfo.value.message_dict) == ['subject']
+
+    url = '/mails/templates/{}'.format(mail_template.pk)
+    response = logged_in_client.post(url, {'subject': 'Hello', 'text': 'Dear {member_nam}'})
+    assert response.status_code == 200
+    assert 'member_nam' in response.content.decode()
+    mail_template.refresh_from_db()
+    assert str(mail_template.text) != 'Dear {member_nam}'
+
+
+@pytest.mark.django_db
+def test_compiled_template_cache(mail_template):
+    compiled = get_compiled_template(mail_template, 'en')
+    assert get_compiled_template(MailTemplate.objects.get(pk=mail_template.pk), 'en') is compiled
+
+    mail_template.text = 'Hi {member_name}!'
+    mail_template.save()
+    subject, text = get_compiled_template(MailTemplate.objects.get(pk=mail_template.pk), 'en')
+    assert text.fields == {'member_name'}
+    with pytest.raises(SendMailException) as excinfo:
+        mail_template.to_mail('test@localhost', context={'name': 'Joe'})
+    assert 'member_name' in str(excinfo.value)
@@ -0,0 +1,164 @@
+import asyncore
+import smtpd
+import threading
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils.timezone import now
+
+from byro.common.models import Job
+from byro.documents.models import Document
+from byro.mails.attachments import AttachmentCache, attachment_cache
+from byro.mails.jobs import send_mails
+from byro.mails.models import EMail
+from byro.mails.outbox import OutboxDispatcher
+
+
+class LocalSMTPServer(smtpd.SMTPServer):
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), None, decode_data=True)
+        self.port = self.socket.getsockname()[1]
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+    def handle_accepted(self, conn, addr):
+        self.connections += 1
+        super().handle_accepted(conn, addr)
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        if self.rejected & set(rcpttos):
+            return '550 No such user'
+        self.messages.append((rcpttos, data))
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = LocalSMTPServer()
+    thread = threading.Thread(target=asyncore.loop, kwargs={'timeout': 0.05})
+    thread.start()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = server.port
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_USE_SSL = False
+    yield server
+    asyncore.close_all()
+    thread.join()
+
+
+@pytest.fixture
+def outbox():
+    return [
+        EMail.objects.create(to='member{}@localhost'.format(index), subject='Mail {}'.format(index), text='Hi!')
+        for index in range(25)
+    ]
+
+
+@pytest.mark.django_db
+def test_outbox_reuses_connections(smtp_server, outbox):
+    report = OutboxDispatcher(batch_size=10).send(outbox)
+
+    assert report == {mail.pk: None for mail in outbox}
+    assert len(smtp_server.messages) == 25
+    assert smtp_server.connections == 3
+    assert not EMail.objects.filter(sent__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_outbox_marks_each_mail(smtp_server, outbox, monkeypatch):
+    EMail.objects.filter(pk=outbox[0].pk).update(sent=now())
+    sent = []
+
+    def throttle(self):
+        if len(sent) == 5:
+            raise SystemExit()
+        sent.append(None)
+
+    monkeypatch.setattr(OutboxDispatcher, 'throttle', throttle)
+    with pytest.raises(SystemExit):
+        OutboxDispatcher(batch_size=10).send(outbox)
+
+    assert len(smtp_server.messages) == 5
+    assert EMail.objects.filter(sent__isnull=False).count() == 6
+    assert 'member0@localhost' not in [recipients[0] for recipients, data in smtp_server.messages]
+
+
+@pytest.mark.django_db
+def test_outbox_isolates_failures(smtp_server, outbox):
+    smtp_server.rejected.add('member3@localhost')
+    report = OutboxDispatcher(batch_size=10).send(outbox)
+
+    assert [pk for pk, error in report.items() if error] == [outbox[3].pk]
+    assert len(smtp_server.messages) == 24
+    failed = EMail.objects.get(pk=outbox[3].pk)
+    assert failed.sent is None
+    assert failed.attempts == 1
+    assert failed.error
+    assert failed.next_attempt is not None
+    assert not EMail.objects.due().exists()
+
+
+@pytest.mark.django_db
+def test_send_job_schedules_retry(smtp_server, outbox):
+    smtp_server.rejected.add('member3@localhost')
+    job = Job.enqueue('mails.send', mails=[mail.pk for mail in outbox])
+    result = send_mails(job, mails=[mail.pk for mail in outbox])
+
+    assert result['sent'] == 24
+    assert result['errors'] == 1
+    follow_up = Job.objects.exclude(pk=job.pk).get()
+    assert follow_up.arguments == {'mails': [outbox[3].pk]}
+    assert follow_up.run_after == EMail.objects.get(pk=outbox[3].pk).next_attempt
+
+
+@pytest.mark.django_db
+def test_outbox_rate_limit(smtp_server, outbox, monkeypatch):
+    delays = []
+    monkeypatch.setattr('byro.mails.outbox.time.sleep', delays.append)
+    OutboxDispatcher(rate_limit=600).send(outbox[:3])
+
+    assert len(delays) == 2
+    assert all(0 < delay <= 0.1 for delay in delays)
+
+
+@pytest.fixture
+def documents(settings, tmpdir):
+    settings.MEDIA_ROOT = str(tmpdir)
+    attachment_cache.clear()
+    yield [
+        Document.objects.create(document=SimpleUploadedFile('doc{}.txt'.format(index), b'x' * 10), title='Document')
+        for index in range(3)
+    ]
+    attachment_cache.clear()
+
+
+@pytest.mark.django_db
+def test_outbox_shared_attachment(smtp_server, outbox, documents, monkeypatch, django_assert_num_queries):
+    for mail in outbox:
+        mail.attachments.add(documents[0])
+    reads = []
+    monkeypatch.setattr('byro.mails.attachments.open', lambda *args: reads.append(args) or open(*args), raising=False)
+
+    # attachment links and documents, then per mail: savepoint, lock, marking as sent, release
+    with django_assert_num_queries(2 + 4 * 25) as context:
+        OutboxDispatcher(batch_size=25).send(outbox)
+
+    assert sum('FOR UPDATE SKIP LOCKED' in query['sql'] for query in context.captured_queries) == 25
+
+    assert len(reads) == 1
+    assert all('doc0' in data for recipients, data in smtp_server.messages)
+
+
+@pytest.mark.django_db
+def test_attachment_cache_eviction(documents):
+    cache = AttachmentCache(max_size=25)
+    first, second, third = documents
+    assert cache.get(first)[1] == b'x' * 10
+    cache.get(second)
+    cache.get(first)
+    cache.get(third)
+
+    assert cache.size == 20
+    assert [key[0] for key in cache.entries] == [first.pk, third.pk]
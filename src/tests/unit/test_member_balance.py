@@ -0,0 +1,119 @@
+from decimal import Decimal
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from byro.bookkeeping.models import (
+    Account, AccountCategory, MemberBalance, VirtualTransaction,
+)
+from byro.members.models import Member
+
+
+def live_balance(member):
+    cutoff = now() - relativedelta(months=36)
+    qs = member.transactions.filter(value_datetime__lte=now(), value_datetime__gte=cutoff)
+    liability = sum(vt.amount for vt in qs.filter(source_account__account_category='member_fees'))
+    asset = sum(vt.amount for vt in qs.filter(destination_account__account_category='member_fees'))
+    return asset - liability
+
+
+@pytest.fixture
+def fee_account():
+    return Account.objects.get(account_category=AccountCategory.MEMBER_FEES)
+
+
+@pytest.fixture
+def transactions(member, fee_account):
+    today = now()
+    return [
+        VirtualTransaction.objects.create(
+            source_account=fee_account, member=member,
+            amount=Decimal('10.00'), value_datetime=today - relativedelta(months=months),
+        )
+        for months in range(0, 40, 3)
+    ] + [
+        VirtualTransaction.objects.create(
+            destination_account=fee_account, member=member,
+            amount=Decimal('25.00'), value_datetime=today - relativedelta(months=months, days=2),
+        )
+        for months in range(0, 20, 4)
+    ]
+
+
+@pytest.mark.django_db
+def test_balance_matches_live_aggregate(member, transactions):
+    assert member.balance == live_balance(member)
+    assert MemberBalance.objects.filter(member=member).exists()
+
+
+@pytest.mark.django_db
+def test_balance_follows_updates_and_deletes(member, transactions):
+    transaction = transactions[1]
+    transaction.amount = Decimal('100.00')
+    transaction.value_datetime -= relativedelta(months=1)
+    transaction.save()
+    assert member.balance == live_balance(member)
+
+    transactions[-1].delete()
+    assert member.balance == live_balance(member)
+
+    member.transactions.all().delete()
+    assert member.balance == 0
+    assert not MemberBalance.objects.filter(member=member).exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_balances_command(member, transactions):
+    call_command('rebuild_balances', check=True)
+
+    MemberBalance.objects.filter(member=member).update(incoming=Decimal('999.00'))
+    with pytest.raises(CommandError):
+        call_command('rebuild_balances', check=True)
+
+    call_command('rebuild_balances')
+    call_command('rebuild_balances', check=True)
+    assert member.balance == live_balance(member)
+
+
+@pytest.mark.django_db
+def test_with_balance_matches_balance(member, transactions):
+    annotated = Member.objects.with_balance().get(pk=member.pk)
+    assert annotated.fee_balance == member.balance
+    assert annotated.fee_asset - annotated.fee_liability == annotated.fee_balance
+    assert Member.objects.with_balance().filter(pk=member.pk, fee_balance__lt=member.balance).count() == 0
+
+
+@pytest.mark.django_db
+def test_member_list_constant_queries(logged_in_client, member, membership, transactions, fee_account, django_assert_max_num_queries):
+    VirtualTransaction.objects.create(
+        source_account=fee_account, member=member,
+        amount=Decimal('100.00'), value_datetime=now() - relativedelta(days=1),
+    )
+    for number in range(10):
+        Member.objects.create(number=str(number))
+    with django_assert_max_num_queries(12):
+        response = logged_in_client.get('/members/list?filter=all&ordering=balance')
+    assert response.status_code == 200
+    assert response.context['members'][0] == member
+
+    owed = -member.balance
+    response = logged_in_client.get('/members/list?filter=all&owing={}'.format(owed - 1))
+    assert list(response.context['members']) == [member]
+    response = logged_in_client.get('/members/list?filter=all&owing={}'.format(owed))
+    assert list(response.context['members']) == []
+
+
+@pytest.mark.django_db
+def test_refresh_locks_member(member, fee_account):
+    with CaptureQueriesContext(connection) as context:
+        VirtualTransaction.objects.create(
+            source_account=fee_account, member=member, amount=Decimal('10.00'), value_datetime=now(),
+        )
+    locks = [query['sql'] for query in context.captured_queries if 'FOR UPDATE' in query['sql']]
+    assert len(locks) == 1
+    assert '"members_member"' in locks[0]
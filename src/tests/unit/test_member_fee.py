@@ -1,7 +1,9 @@
 import pytest
 from dateutil.relativedelta import relativedelta
+from django.db import transaction
 from django.utils import timezone
 
+from byro.bookkeeping.models import Account, AccountCategory, VirtualTransaction
 from byro.members.models import FeeIntervals, Member, Membership
 
 
@@ -48,16 +50,10 @@ def test_liabilities_future_virtualtransactions(member_membership):
     assert len(virtual_transactions) == 3
     assert sum([i.amount for i in virtual_transactions]) == 60
 
-    # set back to current month, this leaves a transaction in the future
+    # set back to current month, the liability in the future is removed
     member_membership.end = end_this_month
     member_membership.save()
     member_membership.member.update_liabilites()
-    # NOTE: update liabilites doesn't delete transactions
-    virtual_transactions = member_membership.member.transactions.all()
-    assert len(virtual_transactions) == 3
-
-    # but the new (temporary?) helper cleans them
-    member_membership.member.remove_future_liabilites_on_leave()
     virtual_transactions = member_membership.member.transactions.all()
     assert len(virtual_transactions) == 2
     assert sum([i.amount for i in virtual_transactions]) == 40
@@ -98,13 +94,131 @@ def test_liabilities_complicated_example(member_membership, member_membership_se
     member_membership.end = end_this_month
     member_membership.save()
     member_membership.member.update_liabilites()
-    # NOTE: update liabilites doesn't delete transactions
-    virtual_transactions = member_membership.member.transactions.all()
-    assert len(virtual_transactions) == 5
-    assert sum([i.amount for i in virtual_transactions]) == 8 + 8 + 20 + 20 + 20
-
-    # but the new (temporary?) helper cleans them
-    member_membership.member.remove_future_liabilites_on_leave()
     virtual_transactions = member_membership.member.transactions.all()
     assert len(virtual_transactions) == 4
     assert sum([i.amount for i in virtual_transactions]) == 8 + 8 + 20 + 20
+
+
+@pytest.fixture
+def many_memberships():
+    today = timezone.now().date()
+    memberships = []
+    for number in range(20):
+        member = Member.objects.create(number='bulk-{}'.format(number))
+        memberships.append(Membership.objects.create(
+            member=member,
+            start=today.replace(day=1) - relativedelta(months=number),
+            amount=10 + number,
+            interval=FeeIntervals.MONTHLY if number % 2 else FeeIntervals.QUARTERLY,
+        ))
+    yield memberships
+    for membership in memberships:
+        membership.member.transactions.all().delete()
+        membership.delete()
+        membership.member.delete()
+
+
+@pytest.mark.django_db
+def test_update_liabilities_bulk(many_memberships, django_assert_max_num_queries):
+    from byro.members.liabilities import update_liabilities
+
+    members = Member.objects.filter(number__startswith='bulk-')
+    with django_assert_max_num_queries(15):
+        created, updated, deleted = update_liabilities(members=members)
+    assert updated == deleted == 0
+    assert created == sum(len(m.member.transactions.all()) for m in many_memberships)
+    for membership in many_memberships:
+        months = int(membership.member.number.split('-')[1])
+        expected = len(range(0, months + 1, membership.interval))
+        assert membership.member.transactions.count() == expected
+        assert membership.member.balance == -membership.amount * expected
+
+    assert update_liabilities(members=members) == (0, 0, 0)
+
+    membership = many_memberships[5]
+    membership.amount = 99
+    membership.save()
+    assert update_liabilities(members=members) == (0, membership.member.transactions.count(), 0)
+    assert membership.member.balance == -99 * membership.member.transactions.count()
+
+    membership = many_memberships[6]
+    count = membership.member.transactions.count()
+    membership.start += relativedelta(months=1)
+    membership.save()
+    created, updated, deleted = update_liabilities(members=members)
+    assert (created, updated) == (count - 1, 0)
+    assert deleted == count
+    assert membership.member.transactions.count() == count - 1
+    assert membership.member.balance == -membership.amount * (count - 1)
+
+    fees = Account.objects.get(account_category=AccountCategory.MEMBER_FEES)
+    VirtualTransaction.objects.create(
+        source_account=fees, member=membership.member, amount=3, value_datetime=timezone.now(),
+    )
+    Membership.objects.filter(pk=membership.pk).delete()
+    with django_assert_max_num_queries(15):
+        assert update_liabilities(members=members) == (0, 0, count - 1)
+    assert membership.member.balance == -3
+
+
+@pytest.fixture
+def liability_updates(monkeypatch):
+    from byro.members import signals
+    calls = []
+
+    def update_liabilities(members):
+        calls.append(set(members.values_list('pk', flat=True)))
+        return signals_update_liabilities(members=members)
+
+    signals_update_liabilities = signals.update_liabilities
+    monkeypatch.setattr(signals, 'update_liabilities', update_liabilities)
+    return calls
+
+
+# The only transactional test: restoring the serialized database a second
+# time fails on the foreign keys of the configuration.
+@pytest.mark.django_db(transaction=True, serialized_rollback=True)
+def test_liabilities_follow_membership_changes(liability_updates):
+    today = timezone.now().date()
+    member = Member.objects.create(number='signal')
+    with transaction.atomic():
+        memberships = [
+            Membership.objects.create(
+                member=member, start=today.replace(day=1) - relativedelta(months=2 * index + 1),
+                end=today.replace(day=1) - relativedelta(months=2 * index, days=1),
+                amount=5, interval=FeeIntervals.MONTHLY,
+            ) for index in range(3)
+        ]
+    assert liability_updates == [{member.pk}]
+    assert member.transactions.count() == 3
+    assert member.balance == -15
+
+    memberships[0].amount = 7
+    memberships[0].save()
+    assert member.balance == -17
+
+    memberships[1].delete()
+    assert member.transactions.count() == 2
+    assert member.balance == -12
+    assert len(liability_updates) == 3
+
+    # Changes that are rolled back, also within a savepoint, update nothing
+    # until the next commit, which updates their member once more
+    liability_updates.clear()
+    first, second = Member.objects.create(number='first'), Member.objects.create(number='second')
+
+    with pytest.raises(ValueError):
+        with transaction.atomic():
+            Membership.objects.create(member=first, start=today, amount=5, interval=FeeIntervals.MONTHLY)
+            raise ValueError()
+    assert liability_updates == []
+
+    with transaction.atomic():
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                Membership.objects.create(member=first, start=today, amount=5, interval=FeeIntervals.MONTHLY)
+                raise ValueError()
+        Membership.objects.create(member=second, start=today, amount=5, interval=FeeIntervals.MONTHLY)
+    assert liability_updates == [{first.pk, second.pk}]
+    assert not first.transactions.exists()
+    assert second.balance == -5
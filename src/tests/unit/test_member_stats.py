@@ -1,4 +1,5 @@
 import pytest
+from dateutil.relativedelta import relativedelta
 
 
 @pytest.mark.django_db
@@ -38,3 +39,20 @@ def test_stats_one_inactive_member(inactive_member):
     for m in member_stats[1:-1]:
         assert m[1] == 0
         assert m[2] == 0
+
+
+@pytest.mark.django_db
+def test_stats_active_and_cached(inactive_member, member, membership, django_assert_num_queries):
+    from byro.members.stats import get_member_statistics
+
+    member_stats = get_member_statistics(include_active=True)
+    assert member_stats[0][3] == 1
+    assert [m[3] for m in member_stats] == [1, 1, 2, 1]
+    assert sum(m[1] for m in member_stats) == 2
+
+    with django_assert_num_queries(1):
+        assert get_member_statistics(include_active=True) == member_stats
+
+    membership.end = membership.end.replace(day=1) - relativedelta(months=1)
+    membership.save()
+    assert get_member_statistics(include_active=True) != member_stats
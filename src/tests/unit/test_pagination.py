@@ -0,0 +1,67 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from byro.bookkeeping.models import Account, AccountCategory, VirtualTransaction
+from byro.members.models import Member
+from byro.office.views.pagination import KeysetPaginationMixin
+
+
+def walk(client, url, key='transactions'):
+    pages = []
+    query = ''
+    while query is not None:
+        response = client.get(url + '?' + query)
+        assert response.status_code == 200
+        pages.append([obj.pk for obj in response.context[key]])
+        query = response.context['keyset_page'].next_query
+    return response, pages
+
+
+@pytest.mark.django_db
+def test_account_detail_keyset_pages(logged_in_client):
+    account = Account.objects.get(account_category=AccountCategory.MEMBER_FEES)
+    today = now()
+    for index in range(60):
+        VirtualTransaction.objects.create(
+            source_account=account, amount=Decimal('1.00'),
+            value_datetime=today - timedelta(days=index // 3),
+        )
+    url = '/accounts/{}/'.format(account.pk)
+    response, pages = walk(logged_in_client, url)
+    assert [len(page) for page in pages] == [25, 25, 10]
+    expected = account.transactions.order_by('-value_datetime', '-id').values_list('pk', flat=True)
+    assert sum(pages, []) == list(expected)
+
+    previous = response.context['keyset_page'].previous_query
+    response = logged_in_client.get(url + '?' + previous)
+    assert [obj.pk for obj in response.context['transactions']] == pages[1]
+
+
+@pytest.mark.django_db
+def test_member_list_keyset_ordering(logged_in_client):
+    for number in range(60):
+        Member.objects.create(number=str(number % 7) if number % 5 else None, name='Member {}'.format(number))
+    for ordering in ('number', '-name', 'balance'):
+        response, pages = walk(logged_in_client, '/members/list?filter=all&ordering={}&'.format(ordering), key='members')
+        members = sum(pages, [])
+        assert len(members) == len(set(members)) == 60
+
+
+@pytest.mark.django_db
+def test_transaction_list_estimated_count(logged_in_client):
+    response = logged_in_client.get('/realtransaction/list')
+    assert response.context['keyset_page'].estimated_count is not None
+
+
+@pytest.mark.django_db
+def test_keyset_seek_uses_row_values():
+    seek = KeysetPaginationMixin().seek
+    queryset = seek(VirtualTransaction.objects.all(), ('-value_datetime', '-id'), [now().isoformat(), 5])
+    assert '("bookkeeping_virtualtransaction"."value_datetime", "bookkeeping_virtualtransaction"."id") <' in str(queryset.query)
+    assert list(queryset) == []
+
+    queryset = seek(Member.objects.all(), ('name', '-id'), ['Ada', 5])
+    assert ' OR ' in str(queryset.query)
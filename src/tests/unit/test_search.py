@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from byro.bookkeeping.models import RealTransaction
+from byro.common.search import (
+    search_members, search_transactions, trigram_available,
+)
+from byro.members.models import Member
+
+
+@pytest.fixture
+def members():
+    ada = Member.objects.create(number='17', name='Ada Lovelace', email='ada@example.org')
+    grace = Member.objects.create(number='42', name='Grace Hopper', email='grace@example.org')
+    grace.profile_profile.nick = 'amazinggrace'
+    grace.profile_profile.save()
+    return ada, grace
+
+
+@pytest.mark.django_db
+def test_search_members(members):
+    ada, grace = members
+    qs = Member.objects.all()
+    assert list(search_members(qs, 'love')) == [ada]
+    assert list(search_members(qs, 'ada lov')) == [ada]
+    assert list(search_members(qs, '42')) == [grace]
+    assert list(search_members(qs, 'grace@example.org')) == [grace]
+    assert list(search_members(qs, 'zing')) == [grace]
+    assert 'JOIN' not in str(search_members(qs, 'zing').query)
+    assert list(search_members(qs, '&|!')) == []
+
+    ada.name = 'Augusta Ada King'
+    ada.save()
+    assert list(search_members(qs, 'king', rank=True)) == [ada]
+    assert list(search_members(qs, 'love')) == []
+
+
+@pytest.mark.django_db
+def test_search_transactions():
+    def create(purpose, originator):
+        return RealTransaction.objects.create(
+            channel='bank', value_datetime=now(), amount=Decimal('10.00'),
+            purpose=purpose, originator=originator,
+        )
+
+    fee = create('Mitgliedsbeitrag Januar', 'Ada Lovelace')
+    donation = create('Spende', 'Grace Hopper')
+    RealTransaction.objects.bulk_create_new([RealTransaction(
+        channel='bank', value_datetime=now(), amount=Decimal('5.00'),
+        purpose='Spende Februar', originator='Bank', importer='test',
+    )])
+    qs = RealTransaction.objects.all()
+    assert list(search_transactions(qs, 'mitglied')) == [fee]
+    assert list(search_transactions(qs, 'hopper')) == [donation]
+    assert search_transactions(qs, 'spende').count() == 2
+    assert list(search_transactions(qs, 'spende feb', rank=True).values_list('originator', flat=True)) == ['Bank']
+
+
+@pytest.mark.django_db
+def test_member_typeahead(logged_in_client, members, django_assert_num_queries):
+    from django.core.cache import cache
+    from byro.plugins.profile.models import MemberProfile
+
+    cache.clear()
+    for number in range(20):
+        Member.objects.create(number='1{}'.format(number), name='Member {}'.format(number))
+    profiles = MemberProfile.objects.count()
+    trigram_available()
+
+    # The session and the user are loaded as well
+    with django_assert_num_queries(3):
+        data = logged_in_client.get('/members/typeahead/?search=member').json()
+    assert data['count'] == 10
+    assert MemberProfile.objects.count() == profiles
+
+    data = logged_in_client.get('/members/typeahead/?search=grace@example.org').json()
+    assert data['results'] == [{'id': members[1].pk, 'number': '42', 'nick': 'amazinggrace', 'name': 'Grace Hopper'}]
+
+    Member.objects.filter(pk=members[1].pk).update(name='Grace Brewster Hopper')
+    with django_assert_num_queries(2):
+        cached = logged_in_client.get('/members/typeahead/?search=grace@example.org').json()
+    assert cached == data
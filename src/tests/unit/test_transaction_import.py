@@ -0,0 +1,148 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.files.base import ContentFile
+from django.utils.timezone import make_aware, now
+
+from byro.bookkeeping.models import RealTransaction, RealTransactionSource
+from byro.bookkeeping.models.real_transaction import SourceState
+from byro.bookkeeping.signals import process_csv_upload
+
+
+@pytest.fixture
+def source():
+    content = 'amount,purpose\n' + ''.join('{},Fee {}\n'.format(n, n) for n in range(1, 11))
+    source = RealTransactionSource()
+    source.source_file.save('import.csv', ContentFile(content.encode()))
+    return source
+
+
+@pytest.fixture
+def importer():
+    broken_rows = set()
+
+    def receiver(sender, **kwargs):
+        for row in sender.read_rows():
+            if row['amount'] in broken_rows:
+                raise ValueError('Cannot parse row')
+            yield RealTransaction(
+                channel='bank', value_datetime=now(), amount=Decimal(row['amount']),
+                purpose=row['purpose'], originator='Bank', importer='test',
+            )
+
+    process_csv_upload.connect(receiver, dispatch_uid='test_importer')
+    yield broken_rows
+    process_csv_upload.disconnect(dispatch_uid='test_importer')
+
+
+@pytest.mark.django_db
+def test_import_in_batches(source, importer):
+    progress = []
+    assert source.process(batch_size=4, progress=progress.append) == 10
+    assert progress == [4, 8, 10]
+    assert source.state == SourceState.PROCESSED
+    assert source.transactions.count() == 10
+
+
+@pytest.mark.django_db
+def test_import_resumes_after_failure(source, importer):
+    importer.add('7')
+    with pytest.raises(ValueError):
+        source.process(batch_size=4)
+    source.refresh_from_db()
+    assert source.state == SourceState.FAILED
+    assert source.rows_processed == 4
+    assert source.failures == [{'row': 6, 'error': 'Cannot parse row'}]
+    assert source.transactions.count() == 4
+
+    importer.clear()
+    assert source.process(batch_size=4) == 6
+    assert source.state == SourceState.PROCESSED
+    assert sorted(source.transactions.values_list('amount', flat=True)) == list(range(1, 11))
+
+
+@pytest.mark.django_db
+def test_import_reports_row_failing_to_insert(source, importer):
+    def receiver(sender, **kwargs):
+        for row in sender.read_rows():
+            yield RealTransaction(
+                channel='bank', value_datetime=now(), importer='test', originator='Bank', purpose=row['purpose'],
+                amount=Decimal('10000000') if row['amount'] == '6' else Decimal(row['amount']),
+            )
+
+    process_csv_upload.disconnect(dispatch_uid='test_importer')
+    process_csv_upload.connect(receiver, dispatch_uid='test_importer')
+    with pytest.raises(Exception):
+        source.process(batch_size=4)
+    source.refresh_from_db()
+    assert source.rows_processed == 4
+    assert [failure['row'] for failure in source.failures] == [5]
+
+
+@pytest.mark.django_db
+def test_import_of_saved_transactions_is_atomic(source):
+    def receiver(sender, **kwargs):
+        transactions = []
+        for row in sender.read_rows():
+            if row['amount'] == '7':
+                raise ValueError('Cannot parse row')
+            transactions.append(RealTransaction.objects.create(
+                channel='bank', value_datetime=now(), amount=Decimal(row['amount']),
+                purpose=row['purpose'], originator='Bank', source=sender,
+            ))
+        return transactions
+
+    process_csv_upload.connect(receiver, dispatch_uid='test_importer')
+    try:
+        with pytest.raises(ValueError):
+            source.process(batch_size=4)
+    finally:
+        process_csv_upload.disconnect(dispatch_uid='test_importer')
+    source.refresh_from_db()
+    assert source.state == SourceState.FAILED
+    assert source.rows_processed == 0
+    assert not RealTransaction.objects.exists()
+
+
+@pytest.mark.django_db
+def test_reimport_skips_known_transactions(source, importer):
+    assert source.process(batch_size=4) == 10
+    fingerprints = set(source.transactions.values_list('fingerprint', flat=True))
+    assert len(fingerprints) == 10
+
+    assert source.process(batch_size=4) == 0
+    assert RealTransaction.objects.count() == 10
+
+    duplicate = RealTransaction.objects.first()
+    duplicate.pk = None
+    duplicate.importer = 'other'
+    assert RealTransaction.objects.bulk_create_new([duplicate]) == 1
+    assert duplicate.fingerprint in fingerprints
+
+
+@pytest.mark.django_db
+def test_fingerprint_accepts_field_values():
+    transaction = RealTransaction(value_datetime='2017-03-01 12:00', amount='10.5', originator='A', purpose='Fee')
+    assert transaction.compute_fingerprint() == RealTransaction(
+        value_datetime=make_aware(datetime(2017, 3, 1, 12)), amount=Decimal('10.50'), originator='A', purpose='Fee',
+    ).compute_fingerprint()
+
+
+@pytest.mark.django_db
+def test_identical_manual_transactions():
+    def donation():
+        return RealTransaction(
+            channel='cash', value_datetime=now(), amount=Decimal('5.00'), originator='Cash box', purpose='Spende',
+        )
+
+    first, second = donation(), donation()
+    first.save()
+    second.save()
+    second.save()
+    assert RealTransaction.objects.count() == 2
+
+    transactions = [donation(), donation()]
+    assert RealTransaction.objects.bulk_create_new(transactions) == 2
+    assert None not in {transaction.pk for transaction in transactions}
+    assert RealTransaction.objects.count() == 4
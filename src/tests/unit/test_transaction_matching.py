@@ -0,0 +1,288 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from byro.bookkeeping.forms import split_transactions
+from byro.bookkeeping.jobs import match_upload
+from byro.bookkeeping.matching import KeywordAutomaton
+from byro.bookkeeping.models import (
+    Account, AccountCategory, FiscalPeriod, RealTransaction,
+    RealTransactionSource, VirtualTransaction,
+)
+from byro.bookkeeping.signals import (
+    derive_virtual_transactions, derive_virtual_transactions_batch,
+)
+from byro.common.models import Job
+from byro.members.models import Member
+
+
+@pytest.fixture
+def real_transactions():
+    return [
+        RealTransaction.objects.create(
+            channel='bank', value_datetime=now(), amount=Decimal(amount),
+            purpose='Fee', originator='Bank', importer='test',
+        )
+        for amount in ('10.00', '0.00', '20.00')
+    ]
+
+
+def match(real_transaction):
+    if not real_transaction.amount:
+        raise ValueError('Empty transaction')
+    return [VirtualTransaction(
+        destination_account=Account.objects.get(account_category=AccountCategory.MEMBER_FEES),
+        amount=real_transaction.amount,
+        value_datetime=real_transaction.value_datetime,
+    )]
+
+
+@pytest.mark.django_db
+def test_batch_matching(real_transactions):
+    batches = []
+
+    def receiver(sender, **kwargs):
+        batches.append(len(sender))
+        return {
+            real_transaction: match(real_transaction)
+            for real_transaction in sender if real_transaction.amount
+        }
+
+    derive_virtual_transactions_batch.connect(receiver, dispatch_uid='test_matcher')
+    try:
+        report = RealTransaction.objects.derive_virtual_transactions(real_transactions, batch_size=2)
+    finally:
+        derive_virtual_transactions_batch.disconnect(dispatch_uid='test_matcher')
+
+    assert batches == [2, 1]
+    assert report == {
+        real_transactions[0].pk: None,
+        real_transactions[1].pk: 'Transaction could not be matched',
+        real_transactions[2].pk: None,
+    }
+    assert real_transactions[2].virtual_transactions.get().amount == Decimal('20.00')
+    assert set(RealTransaction.objects.filter(is_matched=True)) == {real_transactions[0], real_transactions[2]}
+
+
+@pytest.mark.django_db
+def test_batch_matching_without_date_in_open_period(real_transactions):
+    FiscalPeriod.objects.close(now() - timedelta(days=30))
+
+    def receiver(sender, **kwargs):
+        result = {real_transaction: match(real_transaction) for real_transaction in sender if real_transaction.amount}
+        for virtual_transactions in result.values():
+            virtual_transactions[0].value_datetime = None
+        return result
+
+    derive_virtual_transactions_batch.connect(receiver, dispatch_uid='test_matcher')
+    try:
+        report = RealTransaction.objects.derive_virtual_transactions(real_transactions)
+    finally:
+        derive_virtual_transactions_batch.disconnect(dispatch_uid='test_matcher')
+
+    assert report[real_transactions[0].pk] is None
+    assert real_transactions[0].virtual_transactions.get().value_datetime is None
+
+
+@pytest.mark.django_db
+def test_match_upload_skips_matched_transactions(real_transactions):
+    source = RealTransactionSource.objects.create()
+    RealTransaction.objects.filter(pk__in=[rt.pk for rt in real_transactions]).update(source=source)
+    batches = []
+
+    def receiver(sender, **kwargs):
+        batches.append([real_transaction.pk for real_transaction in sender])
+        return {real_transaction: match(real_transaction) for real_transaction in sender if real_transaction.amount}
+
+    derive_virtual_transactions_batch.connect(receiver, dispatch_uid='test_matcher')
+    try:
+        job = Job.enqueue('bookkeeping.match_upload', source=source.pk)
+        assert match_upload(job, source=source.pk)['success'] == 2
+        assert match_upload(job, source=source.pk) == {'success': 0, 'errors': 1, 'report': {
+            str(real_transactions[1].pk): 'Transaction could not be matched',
+        }}
+    finally:
+        derive_virtual_transactions_batch.disconnect(dispatch_uid='test_matcher')
+
+    assert batches[1] == [real_transactions[1].pk]
+    assert VirtualTransaction.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_batch_matching_falls_back_to_single_signal(real_transactions):
+
+    def receiver(sender, **kwargs):
+        virtual_transactions = match(sender)
+        for virtual_transaction in virtual_transactions:
+            virtual_transaction.real_transaction = sender
+            virtual_transaction.save()
+        return virtual_transactions
+
+    derive_virtual_transactions.connect(receiver, dispatch_uid='test_matcher')
+    try:
+        report = RealTransaction.objects.derive_virtual_transactions(real_transactions)
+    finally:
+        derive_virtual_transactions.disconnect(dispatch_uid='test_matcher')
+
+    assert report[real_transactions[0].pk] is None
+    assert report[real_transactions[1].pk] == 'Empty transaction'
+    assert VirtualTransaction.objects.filter(real_transaction__in=real_transactions).count() == 2
+
+
+def test_keyword_automaton():
+    automaton = KeywordAutomaton()
+    for keyword in ('he', 'she', 'his', 'hers', '12'):
+        automaton.add(keyword, keyword)
+    automaton.build()
+    assert sorted(automaton.search('ushers')) == ['he', 'hers', 'she']
+    assert list(automaton.search('ushers 12 123', whole_words=True)) == ['12']
+
+
+@pytest.mark.django_db
+def test_builtin_matcher():
+    fees = Account.objects.get(account_category=AccountCategory.MEMBER_FEES)
+    donations = Account.objects.get(account_category=AccountCategory.MEMBER_DONATION)
+    ada = Member.objects.create(number='17', name='Ada Lovelace')
+    grace = Member.objects.create(number='42', name='Grace Hopper')
+    alan = Member.objects.create(number='100234', name='Alan')
+    grace.profile_sepa.iban = 'DE89370400440532013000'
+    grace.profile_sepa.save()
+
+    def real_transaction(purpose, originator='', amount='10.00', data=None):
+        return RealTransaction.objects.create(
+            channel='bank', value_datetime=now(), amount=Decimal(amount),
+            purpose=purpose, originator=originator, importer='test', data=data,
+        )
+
+    transactions = [
+        real_transaction('Mitgliedsbeitrag 17'),
+        real_transaction('Beitrag', data={'iban': 'DE89 3704 0044 0532 0130 00'}),
+        real_transaction('Spende von Ada Lovelace'),
+        real_transaction('Membership 170'),
+        real_transaction('Member 17, Nr. 42'),
+        real_transaction('Refund 17', amount='-5.00'),
+        real_transaction('Beitrag 17.03.2018'),
+        real_transaction('Beitrag', data={'reference': 'Mitglied 17'}),
+        real_transaction('Beitrag 100234'),
+    ]
+    report = RealTransaction.objects.derive_virtual_transactions(transactions)
+    assert [report[t.pk] is None for t in transactions] == [True, True, True, False, False, False, False, False, True]
+
+    def booking(transaction):
+        vt = transaction.virtual_transactions.get()
+        return vt.member, vt.destination_account
+
+    assert booking(transactions[0]) == (ada, fees)
+    assert booking(transactions[1]) == (grace, fees)
+    assert booking(transactions[2]) == (ada, donations)
+    assert booking(transactions[-1]) == (alan, fees)
+
+    report = RealTransaction.objects.derive_virtual_transactions(transactions[:1])
+    assert report == {transactions[0].pk: None}
+    assert transactions[0].virtual_transactions.count() == 1
+
+
+@pytest.mark.django_db
+def test_is_matched_follows_virtual_transactions(real_transactions):
+    first, second = real_transactions[:2]
+    stale = RealTransaction.objects.get(pk=first.pk)
+    virtual_transaction = match(first)[0]
+    virtual_transaction.real_transaction = first
+    virtual_transaction.save()
+    first.refresh_from_db()
+    assert first.is_matched
+
+    stale.purpose = 'Membership fee'
+    stale.save()
+    first.refresh_from_db()
+    assert first.is_matched
+    assert first.purpose == 'Membership fee'
+
+    virtual_transaction = VirtualTransaction.objects.get(pk=virtual_transaction.pk)
+    virtual_transaction.real_transaction = second
+    virtual_transaction.save()
+    assert list(RealTransaction.objects.filter(is_matched=True)) == [second]
+
+    virtual_transaction.delete()
+    assert not RealTransaction.objects.filter(is_matched=True).exists()
+
+
+@pytest.mark.django_db
+def test_unmatched_queue(logged_in_client, real_transactions):
+    RealTransaction.objects.filter(pk=real_transactions[1].pk).update(is_matched=True)
+    for index in range(30):
+        RealTransaction.objects.create(
+            channel='bank', value_datetime=real_transactions[0].value_datetime, amount=Decimal('1.00'),
+            purpose='Fee {}'.format(index), originator='Bank', importer='test',
+        )
+    seen = []
+    url = '/realtransaction/queue'
+    while url:
+        response = logged_in_client.get(url)
+        assert response.status_code == 200
+        seen += [transaction.pk for transaction in response.context['transactions']]
+        query = response.context['keyset_page'].next_query
+        url = '/realtransaction/queue?' + query if query else None
+    expected = RealTransaction.objects.filter(is_matched=False).order_by('-value_datetime', '-id')
+    assert seen == list(expected.values_list('pk', flat=True))
+    assert len(seen) == 32
+
+
+def match_form_data(*lines):
+    data = {
+        'form-TOTAL_FORMS': str(len(lines)),
+        'form-INITIAL_FORMS': '0',
+        'form-MIN_NUM_FORMS': '0',
+        'form-MAX_NUM_FORMS': '1000',
+    }
+    for index, line in enumerate(lines):
+        for key, value in line.items():
+            data['form-{}-{}'.format(index, key)] = value
+    return data
+
+
+@pytest.mark.django_db
+def test_match_view_splits(logged_in_client, real_transactions):
+    fees = Account.objects.get(account_category=AccountCategory.MEMBER_FEES)
+    donations = Account.objects.get(account_category=AccountCategory.MEMBER_DONATION)
+    ids = '&'.join('ids={}'.format(rt.pk) for rt in (real_transactions[0], real_transactions[2]))
+    response = logged_in_client.post('/realtransaction/match?' + ids, match_form_data(
+        {'destination_account': fees.pk, 'amount': '25', 'split': 'percentage'},
+        {'destination_account': donations.pk, 'amount': ''},
+    ))
+
+    assert response.status_code == 302
+    for real_transaction, fee in ((real_transactions[0], '2.50'), (real_transactions[2], '5.00')):
+        real_transaction.refresh_from_db()
+        assert real_transaction.is_matched
+        amounts = dict(real_transaction.virtual_transactions.values_list('destination_account', 'amount'))
+        assert amounts == {fees.pk: Decimal(fee), donations.pk: real_transaction.amount - Decimal(fee)}
+    assert not VirtualTransaction.objects.filter(real_transaction=real_transactions[1]).exists()
+
+
+@pytest.mark.django_db
+def test_match_view_rejects_excessive_split(logged_in_client, real_transactions):
+    fees = Account.objects.get(account_category=AccountCategory.MEMBER_FEES)
+    ids = '&'.join('ids={}'.format(rt.pk) for rt in (real_transactions[0], real_transactions[2]))
+    response = logged_in_client.post('/realtransaction/match?' + ids, match_form_data(
+        {'destination_account': fees.pk, 'amount': '15'},
+    ))
+
+    assert response.status_code == 200
+    assert 'exceeds the amount' in response.content.decode()
+    assert not VirtualTransaction.objects.exists()
+
+
+@pytest.mark.django_db
+def test_split_negative_transaction():
+    fees = Account.objects.get(account_category=AccountCategory.MEMBER_FEES)
+    donations = Account.objects.get(account_category=AccountCategory.MEMBER_DONATION)
+    refund = RealTransaction.objects.create(
+        channel='bank', value_datetime=now(), amount=Decimal('-20.00'), purpose='Refund', originator='Bank',
+    )
+
+    for first in ({'amount': Decimal('5')}, {'amount': Decimal('-5')}, {'amount': Decimal('25'), 'split': 'percentage'}):
+        lines = [dict(first, source_account=fees), {'source_account': donations, 'amount': None}]
+        assert [vt.amount for vt in split_transactions([refund], lines)] == [Decimal('5'), Decimal('15')]